@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+import cv2
+from app.camera.frame_buffer import FrameRingBuffer, DEFAULT_BUFFER_SIZE
+
+# Capture backend: "pylon" (Basler camera) or "replay" (images/video from disk, no camera needed)
+CAMERA_BACKEND = os.environ.get("CAMERA_BACKEND", "pylon")
+# Replay backend: folder of images, a single image or a video file
+CAMERA_REPLAY_SOURCE = os.environ.get("CAMERA_REPLAY_SOURCE", "storage/captured_images")
+CAMERA_REPLAY_FPS = float(os.environ.get("CAMERA_REPLAY_FPS", "10"))
+# Standard deviation of the frame interval (ms), like a real camera/trigger
+CAMERA_REPLAY_JITTER_MS = float(os.environ.get("CAMERA_REPLAY_JITTER_MS", "3"))
+# Test without camera: every trigger loads this image instead of a camera frame (empty = use the camera)
+CAMERA_TEST_IMAGE = os.environ.get("CAMERA_TEST_IMAGE", "")
+
+class CameraBackend:
+    """
+    Common interface of the capture backends.
+
+    A backend delivers BGR numpy frames, either one at a time (capture_image)
+    or continuously from a grab thread into a FrameRingBuffer (streaming).
+    Subclasses implement the device specific part: open(), _start_acquisition(),
+    _grab(), _stop_acquisition(), _grab_one() and the trigger configuration.
+    """
+
+    name = "base"
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.frame_buffer = FrameRingBuffer(buffer_size)
+        self._grab_thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.grab_errors = 0
+        # Callables listener(timestamp, frame_id), called from the grab thread for every frame
+        self.frame_listeners = []
+
+    # ---- Device specific part ----
+
+    def open(self):
+        """
+        Open the capture device.
+
+        Returns:
+            bool: True if the device is ready.
+        """
+        raise NotImplementedError
+
+    def _start_acquisition(self):
+        """Start continuous acquisition on the device (returns True on success)."""
+        raise NotImplementedError
+
+    def _grab(self):
+        """Wait for the next frame (grab thread); returns the BGR frame or None."""
+        raise NotImplementedError
+
+    def _stop_acquisition(self):
+        """Stop continuous acquisition on the device."""
+
+    def _grab_one(self, timeout):
+        """Grab a single frame without streaming; returns the BGR frame or None."""
+        raise NotImplementedError
+
+    def enable_hardware_trigger(self, line="Line1", activation="RisingEdge"):
+        """
+        Acquire one frame per trigger pulse (e.g. a part sensor).
+
+        Args:
+            line (str): Trigger source, e.g. "Line1".
+            activation (str): "RisingEdge" or "FallingEdge".
+
+        Returns:
+            bool: True if the trigger was configured.
+        """
+        print(f"[!] Hardware trigger is not supported by the {self.name} camera backend")
+        return False
+
+    def disable_hardware_trigger(self):
+        """Go back to free-running acquisition."""
+
+    def close(self):
+        """Stop streaming and release the device (call on application shutdown)."""
+        self.stop_streaming()
+
+    # ---- Streaming ----
+
+    def start_streaming(self):
+        """
+        Start continuous acquisition into the frame ring buffer.
+
+        Returns:
+            bool: True if the camera is streaming.
+        """
+        if self.is_streaming():
+            return True
+        if not self.open() or not self._start_acquisition():
+            return False
+
+        self._stop_event.clear()
+        self._grab_thread = threading.Thread(target=self._grab_loop, name="CameraGrab", daemon=True)
+        self._grab_thread.start()
+        print(f"Camera streaming started ({self.name})")
+        return True
+
+    def _grab_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                frame = self._grab()
+            except Exception as e:
+                self.grab_errors += 1
+                print(f"Error grabbing frame: {e}")
+                continue
+            if frame is None:
+                continue
+            # Host time so it can be compared with trigger times
+            timestamp = time.monotonic()
+            frame_id = self.frame_buffer.put(frame, timestamp)
+            for listener in self.frame_listeners:
+                try:
+                    listener(timestamp, frame_id)
+                except Exception as e:
+                    print(f"Error in frame listener: {e}")
+
+    def is_streaming(self):
+        return self._grab_thread is not None and self._grab_thread.is_alive()
+
+    def stop_streaming(self, timeout=2.0):
+        """Stop continuous acquisition (the device stays open)."""
+        self._stop_event.set()
+        if self._grab_thread is not None:
+            self._grab_thread.join(timeout)
+            self._grab_thread = None
+        self._stop_acquisition()
+
+    def latest_frame(self, timeout=1.0):
+        """
+        Get a copy of the most recent streamed frame.
+
+        Args:
+            timeout (float): Seconds to wait if no frame has arrived yet.
+
+        Returns:
+            numpy.ndarray: The BGR frame, or None if no frame is available.
+        """
+        entry = self.frame_buffer.latest(timeout)
+        return entry[0] if entry else None
+
+    def frame_at(self, timestamp, timeout=1.0):
+        """
+        Get the first streamed frame captured at or after a trigger time.
+
+        Args:
+            timestamp (float): Trigger time (time.monotonic()).
+            timeout (float): Seconds to wait for that frame.
+
+        Returns:
+            numpy.ndarray: The BGR frame, or None if it did not arrive in time or was already overwritten.
+        """
+        entry = self.frame_buffer.at(timestamp, timeout)
+        return entry[0] if entry else None
+
+    def capture_image(self, timeout=1000):
+        """
+        Capture one frame.
+
+        Uses the ring buffer when streaming, otherwise grabs a single frame
+        (the device is left open for the next capture).
+
+        Args:
+            timeout (int): Timeout for capturing the image in milliseconds.
+
+        Returns:
+            numpy.ndarray: The BGR frame, or None if failed.
+        """
+        if self.is_streaming():
+            return self.latest_frame(timeout / 1000)
+        if not self.open():
+            return None
+        try:
+            return self._grab_one(timeout)
+        except Exception as e:
+            print(f"Error capturing image: {e}")
+            return None
+
+    def get_stats(self):
+        """
+        Get acquisition counters.
+
+        Returns:
+            dict: Ring buffer counters, grab errors, backend name and whether the camera is streaming.
+        """
+        stats = self.frame_buffer.stats()
+        stats["grab_errors"] = self.grab_errors
+        stats["streaming"] = self.is_streaming()
+        stats["backend"] = self.name
+        return stats
+
+    def grab_frame_from_file(self, file_path):
+        """
+        Load an image from file as a numpy frame (for testing purposes).
+
+        The frame is returned in memory so it can go straight to the detector,
+        persistence happens later, off the critical path.
+
+        Args:
+            file_path (str): Path to the image file to load.
+
+        Returns:
+            numpy.ndarray: The BGR image, or None if failed.
+        """
+        try:
+            # Check if file exists
+            if not os.path.exists(file_path):
+                print(f"Error: File not found: {file_path}")
+                return None
+
+            # Load the image from file
+            img = cv2.imread(file_path)
+
+            if img is None:
+                print(f"Error: Could not load image from {file_path}")
+                return None
+
+            return img
+
+        except Exception as e:
+            print(f"Error loading image from file: {e}")
+            return None
+
+def create_camera(backend=None, **kwargs):
+    """
+    Create the configured capture backend.
+
+    The backend modules are imported here, so pypylon is only needed when
+    the Basler camera is actually used.
+
+    Args:
+        backend (str): "pylon" or "replay" (optional, defaults to CAMERA_BACKEND).
+        **kwargs: Passed to the backend constructor.
+
+    Returns:
+        CameraBackend: The (not yet opened) camera.
+    """
+    backend = backend or CAMERA_BACKEND
+    if backend == "replay":
+        from app.camera.replay_camera import ReplayCamera
+        kwargs.setdefault("source", CAMERA_REPLAY_SOURCE)
+        kwargs.setdefault("fps", CAMERA_REPLAY_FPS)
+        kwargs.setdefault("jitter_ms", CAMERA_REPLAY_JITTER_MS)
+        return ReplayCamera(**kwargs)
+    if backend == "pylon":
+        from app.camera.basler_camera import PylonCamera
+        return PylonCamera(**kwargs)
+    raise ValueError(f"Unknown camera backend: {backend}")
@@ -1,82 +1,136 @@
-import os
-import cv2
 from pypylon import pylon
-from sqlite_database.src.db_operations import save_detection_to_db  # Import the database function
-
-class PylonCamera:
-    # def __init__(self):
-    #     # Initialize the camera but do not open it yet
-    #     self.camera = pylon.InstantCamera(pylon.TlFactory.GetInstance().CreateFirstDevice())
-
-    # def capture_image(self, timeout=1000):
-    #     """
-    #     Capture an image and save it directly to the database.
-
-    #     Args:
-    #         timeout (int): Timeout for capturing the image.
-
-    #     Returns:
-    #         int: The row_id of the saved image in the database, or None if failed.
-    #     """
-    #     try:
-    #         # Open the camera
-    #         self.camera.Open()
-
-    #         # Capture an image with a timeout
-    #         grab_result = self.camera.GrabOne(timeout)
-
-    #         if grab_result.GrabSucceeded():
-    #             # Get the image as a numpy array (OpenCV format)
-    #             img = grab_result.Array
-
-    #             # Encode the image as binary data
-    #             _, img_encoded = cv2.imencode('.png', img)
-    #             img_binary = img_encoded.tobytes()
-
-    #             # Save the image to the database (only raw image)
-    #             row_id = save_detection_to_db(img_binary, None, None)
-    #             return row_id
-    #         else:
-    #             return None
-    #     except Exception as e:
-    #         print(f"Error capturing image: {e}")
-    #         return None
-    #     finally:
-    #         # Close the camera to release resources
-    #         self.camera.Close()
-
-    def capture_image_from_file(self, file_path = "/home/ducanh/Desktop/defect_detection_prj/storage/captured_images/captured_image_20250514_115344.png"):
+from app.camera.base import CameraBackend
+from app.camera.frame_buffer import DEFAULT_BUFFER_SIZE
+
+# Timeout of one RetrieveResult() call in the grab loop (ms)
+GRAB_TIMEOUT_MS = 500
+
+class PylonCamera(CameraBackend):
+    """
+    Basler camera (GigE) with a streaming acquisition mode.
+
+    In streaming mode the camera stays open and a grab thread retrieves frames
+    continuously into a FrameRingBuffer, so an inspection only copies the
+    latest frame (or the frame at its trigger time) instead of paying for
+    Open()/GrabOne()/Close() on every part.
+    """
+
+    name = "pylon"
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE, grab_timeout=GRAB_TIMEOUT_MS):
+        super().__init__(buffer_size)
+        # The device is opened lazily so that file-based testing does not need a camera
+        self.camera = None
+        self.converter = None
+        self.grab_timeout = grab_timeout
+
+    def open(self):
+        """
+        Open the first camera found and keep it open.
+
+        Returns:
+            bool: True if the camera is open.
+        """
+        with self._lock:
+            if self.camera is not None and self.camera.IsOpen():
+                return True
+            try:
+                self.camera = pylon.InstantCamera(pylon.TlFactory.GetInstance().CreateFirstDevice())
+                self.camera.Open()
+                # Deliver frames as BGR for OpenCV/YOLO, whatever the sensor pixel format
+                self.converter = pylon.ImageFormatConverter()
+                self.converter.OutputPixelFormat = pylon.PixelType_BGR8packed
+                self.converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
+                print(f"Camera opened: {self.camera.GetDeviceInfo().GetModelName()}")
+                return True
+            except Exception as e:
+                print(f"Error opening camera: {e}")
+                self.camera = None
+                return False
+
+    def _to_array(self, grab_result):
+        if self.converter is not None and not self.converter.ImageHasDestinationFormat(grab_result):
+            return self.converter.Convert(grab_result).GetArray()
+        return grab_result.Array
+
+    def _start_acquisition(self):
+        try:
+            # Only the newest frame is queued by the driver: frames are dropped, never backed up
+            self.camera.StartGrabbing(pylon.GrabStrategy_LatestImageOnly)
+            return True
+        except Exception as e:
+            print(f"Error starting camera stream: {e}")
+            return False
+
+    def _grab(self):
+        if not self.camera.IsGrabbing():
+            # Grabbing stopped underneath us (e.g. camera unplugged): end the grab loop
+            self._stop_event.set()
+            return None
+        grab_result = self.camera.RetrieveResult(self.grab_timeout, pylon.TimeoutHandling_Return)
+        if grab_result is None or not grab_result.IsValid():
+            return None
+        try:
+            if grab_result.GrabSucceeded():
+                # GetArray() copies, so the result can be released before buffering
+                return self._to_array(grab_result)
+            self.grab_errors += 1
+            return None
+        finally:
+            grab_result.Release()
+
+    def _stop_acquisition(self):
+        if self.camera is not None and self.camera.IsGrabbing():
+            self.camera.StopGrabbing()
+
+    def _grab_one(self, timeout):
+        grab_result = self.camera.GrabOne(timeout)
+        try:
+            if grab_result.GrabSucceeded():
+                return self._to_array(grab_result).copy()
+            return None
+        finally:
+            grab_result.Release()
+
+    def enable_hardware_trigger(self, line="Line1", activation="RisingEdge"):
         """
-        Load an image from file and save it to the database (for testing purposes).
+        Acquire one frame per pulse on a trigger input line (e.g. a part sensor).
 
         Args:
-            file_path (str): Path to the image file to load.
+            line (str): Trigger source, e.g. "Line1".
+            activation (str): "RisingEdge" or "FallingEdge".
 
         Returns:
-            int: The row_id of the saved image in the database, or None if failed.
+            bool: True if the trigger was configured.
         """
+        if not self.open():
+            return False
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                print(f"Error: File not found: {file_path}")
-                return None
-            
-            # Load the image from file
-            img = cv2.imread(file_path)
-            
-            if img is None:
-                print(f"Error: Could not load image from {file_path}")
-                return None
-            
-            # Encode the image as binary data
-            _, img_encoded = cv2.imencode('.png', img)
-            img_binary = img_encoded.tobytes()
-
-            # Save the image to the database (only raw image)
-            row_id = save_detection_to_db(img_binary, None, None)
-            print(f"Test image loaded from {file_path} and saved to database with row_id: {row_id}")
-            return row_id
-            
+            self.camera.TriggerSelector.SetValue("FrameStart")
+            self.camera.TriggerMode.SetValue("On")
+            self.camera.TriggerSource.SetValue(line)
+            self.camera.TriggerActivation.SetValue(activation)
+            print(f"Hardware trigger enabled on {line} ({activation})")
+            return True
         except Exception as e:
-            print(f"Error loading image from file: {e}")
-            return None
\ No newline at end of file
+            print(f"Error enabling hardware trigger: {e}")
+            return False
+
+    def disable_hardware_trigger(self):
+        """Go back to free-running acquisition."""
+        if self.camera is not None and self.camera.IsOpen():
+            try:
+                self.camera.TriggerSelector.SetValue("FrameStart")
+                self.camera.TriggerMode.SetValue("Off")
+            except Exception as e:
+                print(f"Error disabling hardware trigger: {e}")
+
+    def close(self):
+        """Stop streaming and release the camera (call on application shutdown)."""
+        self.stop_streaming()
+        with self._lock:
+            if self.camera is not None:
+                if self.camera.IsOpen():
+                    self.camera.Close()
+                self.camera = None
+                print("Camera closed")
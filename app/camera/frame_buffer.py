@@ -0,0 +1,147 @@
+import threading
+import time
+import numpy as np
+
+# Number of frames kept by the streaming camera (~1 s of history at 15-20 fps)
+DEFAULT_BUFFER_SIZE = 16
+
+class FrameRingBuffer:
+    """
+    Fixed-size ring of preallocated numpy frames, written by a grab thread.
+
+    The writer never blocks: when readers fall behind, the oldest frame is
+    overwritten (and counted as dropped if nobody read it). Readers get a copy,
+    so a slot can be reused while the frame is still being processed.
+    """
+
+    def __init__(self, capacity=DEFAULT_BUFFER_SIZE):
+        self.capacity = capacity
+        # Allocated on the first frame, once the sensor size and pixel format are known
+        self._frames = None
+        self._timestamps = [None] * capacity
+        self._frame_ids = [None] * capacity
+        self._read = [True] * capacity
+        self._next_index = 0
+        self._count = 0
+        self._next_frame_id = 0
+        # Capture time of the newest frame no longer in the buffer
+        self._lost_timestamp = None
+        self._cond = threading.Condition()
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def put(self, frame, timestamp=None):
+        """
+        Copy a frame into the next slot, overwriting the oldest frame.
+
+        Args:
+            frame (numpy.ndarray): The grabbed frame.
+            timestamp (float): Capture time (time.monotonic(), optional, defaults to now).
+
+        Returns:
+            int: The frame ID assigned to the frame.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._cond:
+            if self._frames is None or self._frames.shape[1:] != frame.shape or self._frames.dtype != frame.dtype:
+                self._frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+                self._forget()
+            index = self._next_index
+            if self._count == self.capacity:
+                self._lost_timestamp = self._timestamps[index]
+                if not self._read[index]:
+                    self.frames_dropped += 1
+            np.copyto(self._frames[index], frame)
+            frame_id = self._next_frame_id
+            self._timestamps[index] = timestamp
+            self._frame_ids[index] = frame_id
+            self._read[index] = False
+            self._next_index = (index + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._next_frame_id += 1
+            self.frames_written += 1
+            self._cond.notify_all()
+        return frame_id
+
+    def _slot(self, index):
+        self._read[index] = True
+        return self._frames[index].copy(), self._timestamps[index], self._frame_ids[index]
+
+    def _indices(self):
+        """Slot indices from oldest to newest (caller holds the lock)."""
+        start = (self._next_index - self._count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self._count)]
+
+    def latest(self, timeout=None, newer_than=None):
+        """
+        Get the most recent frame.
+
+        Args:
+            timeout (float): Seconds to wait if no (new enough) frame is available yet (optional).
+            newer_than (int): Only accept a frame with an ID greater than this (optional).
+
+        Returns:
+            tuple: (frame copy, timestamp, frame_id), or None if no frame arrived in time.
+        """
+        def available():
+            if self._count == 0:
+                return False
+            newest = self._frame_ids[(self._next_index - 1) % self.capacity]
+            return newer_than is None or newest > newer_than
+
+        with self._cond:
+            if not self._cond.wait_for(available, timeout):
+                return None
+            return self._slot((self._next_index - 1) % self.capacity)
+
+    def at(self, timestamp, timeout=None):
+        """
+        Get the first frame captured at or after a trigger time.
+
+        Args:
+            timestamp (float): Trigger time (time.monotonic()).
+            timeout (float): Seconds to wait for that frame to arrive (optional).
+
+        Returns:
+            tuple: (frame copy, timestamp, frame_id), or None if the frame did not arrive
+                in time or was already overwritten.
+        """
+        def find():
+            for index in self._indices():
+                if self._timestamps[index] >= timestamp:
+                    return index
+            return None
+
+        with self._cond:
+            if self._lost_timestamp is not None and self._lost_timestamp >= timestamp:
+                # The frame of that trigger was already overwritten
+                return None
+            if not self._cond.wait_for(lambda: find() is not None, timeout):
+                return None
+            return self._slot(find())
+
+    def clear(self):
+        """Forget every buffered frame (the preallocated memory is kept)."""
+        with self._cond:
+            self._forget()
+
+    def _forget(self):
+        if self._count:
+            self._lost_timestamp = self._timestamps[(self._next_index - 1) % self.capacity]
+        self._count = 0
+        self._read = [True] * self.capacity
+
+    def stats(self):
+        """
+        Get buffer counters.
+
+        Returns:
+            dict: frames_written, frames_dropped (overwritten before being read) and buffered.
+        """
+        with self._cond:
+            return {
+                "frames_written": self.frames_written,
+                "frames_dropped": self.frames_dropped,
+                "buffered": self._count,
+            }
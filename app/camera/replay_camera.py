@@ -0,0 +1,205 @@
+import glob
+import os
+import random
+import time
+import cv2
+from app.camera.base import CameraBackend
+from app.camera.frame_buffer import DEFAULT_BUFFER_SIZE
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+
+# Decoded images kept in memory, so replay measures the station and not PNG decoding
+MAX_CACHED_FRAMES = 64
+
+class ReplayCamera(CameraBackend):
+    """
+    Simulated camera replaying images or a video from disk.
+
+    Frames are delivered at a configurable rate with Gaussian jitter on the
+    frame interval, through the same ring buffer and frame listeners as the
+    Basler camera, so the whole station can be load tested on a developer
+    machine without a camera.
+    """
+
+    name = "replay"
+
+    def __init__(self, source="storage/captured_images", fps=10.0, jitter_ms=3.0, loop=True,
+                 buffer_size=DEFAULT_BUFFER_SIZE, seed=None):
+        """
+        Args:
+            source (str): Folder of images, a single image or a video file.
+            fps (float): Target frame rate.
+            jitter_ms (float): Standard deviation of the frame interval in milliseconds.
+            loop (bool): Start again at the first frame after the last one.
+            buffer_size (int): Number of frames kept in the ring buffer.
+            seed (int): Seed of the jitter generator, for reproducible runs (optional).
+        """
+        super().__init__(buffer_size)
+        self.source = source
+        self.fps = fps
+        self.jitter_ms = jitter_ms
+        self.loop = loop
+        self.hardware_trigger = False
+        self.frames_replayed = 0
+
+        self._random = random.Random(seed)
+        self._files = None
+        self._video = None
+        self._cache = {}
+        self._index = 0
+        self._exhausted = False
+        self._next_time = None
+        self._started_at = None
+
+    def open(self):
+        """
+        Index the replay source.
+
+        Returns:
+            bool: True if there is something to replay.
+        """
+        with self._lock:
+            if self._files is not None or self._video is not None:
+                return True
+            source = self.source
+            if os.path.isdir(source):
+                files = sorted(
+                    path for path in glob.glob(os.path.join(source, "*"))
+                    if path.lower().endswith(IMAGE_EXTENSIONS)
+                )
+                if not files:
+                    print(f"[!] No images to replay in {source}")
+                    return False
+                self._files = files
+                description = f"{len(files)} images"
+            elif source.lower().endswith(VIDEO_EXTENSIONS):
+                video = cv2.VideoCapture(source)
+                if not video.isOpened():
+                    print(f"[!] Could not open replay video {source}")
+                    return False
+                self._video = video
+                description = "video"
+            elif os.path.isfile(source):
+                self._files = [source]
+                description = "1 image"
+            else:
+                print(f"[!] Replay source not found: {source}")
+                return False
+            print(f"Replay camera opened: {source} ({description}, {self.fps:g} fps)")
+            return True
+
+    def _next_frame(self):
+        """Read the next frame of the source (None at the end when not looping)."""
+        if self._video is not None:
+            ok, frame = self._video.read()
+            if not ok and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self._video.read()
+            if not ok:
+                self._exhausted = True
+            return frame if ok else None
+
+        if self._index >= len(self._files):
+            if not self.loop:
+                self._exhausted = True
+                return None
+            self._index = 0
+        index = self._index
+        self._index += 1
+        frame = self._cache.get(index)
+        if frame is None:
+            frame = cv2.imread(self._files[index])
+            if frame is None:
+                print(f"[!] Could not read replay image {self._files[index]}")
+                self.grab_errors += 1
+                return None
+            if len(self._cache) < MAX_CACHED_FRAMES:
+                self._cache[index] = frame
+        return frame
+
+    def _interval(self):
+        period = 1.0 / self.fps
+        jitter = self._random.gauss(0.0, self.jitter_ms / 1000) if self.jitter_ms > 0 else 0.0
+        # Never faster than 10x the nominal rate, whatever the jitter
+        return max(period * 0.1, period + jitter)
+
+    def _start_acquisition(self):
+        if self._exhausted:
+            # Restart a finished (non-looping) replay from the beginning
+            self._index = 0
+            if self._video is not None:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._exhausted = False
+        self._next_time = None
+        self._started_at = time.monotonic()
+        return True
+
+    def _grab(self):
+        # Read/decode first: like sensor readout, it happens within the frame interval
+        frame = self._next_frame()
+        if self._exhausted:
+            print("Replay finished")
+            self._stop_event.set()
+            return None
+
+        now = time.monotonic()
+        if self._next_time is None or now - self._next_time > 1.0 / self.fps:
+            # First frame, or too far behind: drop the backlog like a real camera would
+            self._next_time = now
+        self._next_time += self._interval()
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            self._stop_event.wait(delay)
+        if frame is not None:
+            self.frames_replayed += 1
+        return frame
+
+    def _grab_one(self, timeout):
+        frame = self._next_frame()
+        return frame.copy() if frame is not None else None
+
+    def enable_hardware_trigger(self, line="Line1", activation="RisingEdge"):
+        """
+        Simulate a part sensor: every replayed frame stands for one triggered part.
+
+        Args:
+            line (str): Ignored, kept for interface compatibility.
+            activation (str): Ignored, kept for interface compatibility.
+
+        Returns:
+            bool: Always True.
+        """
+        self.hardware_trigger = True
+        print(f"Simulated hardware trigger: one part per replayed frame ({self.fps:g} parts/s)")
+        return True
+
+    def disable_hardware_trigger(self):
+        """Go back to free-running acquisition."""
+        self.hardware_trigger = False
+
+    def close(self):
+        """Stop streaming and release the replay source."""
+        self.stop_streaming()
+        with self._lock:
+            if self._video is not None:
+                self._video.release()
+                self._video = None
+            self._files = None
+            self._cache.clear()
+            self._index = 0
+            self._exhausted = False
+
+    def get_stats(self):
+        """
+        Get acquisition counters.
+
+        Returns:
+            dict: Ring buffer counters, grab errors, streaming flag, frames replayed
+                and the measured frame rate.
+        """
+        stats = super().get_stats()
+        stats["frames_replayed"] = self.frames_replayed
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        stats["fps"] = self.frames_replayed / elapsed if elapsed > 0 else 0.0
+        return stats
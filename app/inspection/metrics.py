@@ -0,0 +1,144 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per stage for the rolling percentiles
+WINDOW_SIZE = 500
+
+# Display order of the instrumented stages (the cycle of one part, then history/UI work)
+STAGES = (
+    "camera_grab", "preprocess", "inference", "annotate", "ui_render",
+    "image_encode", "thumbnail", "db_insert", "db_read", "decode",
+)
+
+class LatencyMetrics:
+    """
+    Rolling latency statistics per stage.
+
+    Each stage keeps its last WINDOW_SIZE samples; percentiles are computed
+    from that window when a summary is requested, so recording a sample is
+    just an append under a lock and can be done from any thread.
+    """
+
+    def __init__(self, window=WINDOW_SIZE):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, stage, elapsed_ms):
+        """
+        Record one measurement.
+
+        Args:
+            stage (str): Stage name, e.g. "inference".
+            elapsed_ms (float): Duration in milliseconds.
+        """
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            samples.append(elapsed_ms)
+            self._counts[stage] += 1
+
+    @contextmanager
+    def timed(self, stage):
+        """Context manager recording the duration of its block under a stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        """
+        Get the rolling statistics of every stage seen so far.
+
+        Returns:
+            list: One dict per stage (stage, count, last, mean, p50, p95, p99, max in ms),
+                in STAGES order then by name.
+        """
+        with self._lock:
+            snapshot = {stage: (list(samples), self._counts[stage]) for stage, samples in self._samples.items()}
+
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        rows = []
+        for stage in sorted(snapshot, key=lambda name: (order.get(name, len(STAGES)), name)):
+            samples, count = snapshot[stage]
+            ordered = sorted(samples)
+            rows.append({
+                "stage": stage,
+                "count": count,
+                "last": samples[-1],
+                "mean": sum(samples) / len(samples),
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "p99": _percentile(ordered, 99),
+                "max": ordered[-1],
+            })
+        return rows
+
+    def get(self, stage):
+        """Get the summary row of one stage, or None if it has no samples yet."""
+        return next((row for row in self.summary() if row["stage"] == stage), None)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self.started_at = time.time()
+
+    def dump(self, path):
+        """
+        Write the current summary to a file, CSV or JSON depending on the extension.
+
+        Args:
+            path (str): Output path ending in .csv or .json.
+
+        Returns:
+            str: The path written.
+        """
+        rows = self.summary()
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "started_at": self.started_at,
+                    "dumped_at": time.time(),
+                    "window": self.window,
+                    "stages": rows,
+                }, f, indent=2)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=["stage", "count", "last", "mean", "p50", "p95", "p99", "max"])
+                writer.writeheader()
+                writer.writerows(rows)
+        return path
+
+def _percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+# Shared instance for the whole application
+_metrics = LatencyMetrics()
+
+def get_latency_metrics():
+    """
+    Get the shared latency metrics.
+
+    Returns:
+        LatencyMetrics: The application-wide instance.
+    """
+    return _metrics
+
+def timed(stage):
+    """Time a block into the shared metrics: `with timed("inference"): ...`"""
+    return _metrics.timed(stage)
+
+def record_latency(stage, elapsed_ms):
+    """Record one measurement (ms) into the shared metrics."""
+    _metrics.record(stage, elapsed_ms)
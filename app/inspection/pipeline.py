@@ -0,0 +1,215 @@
+import queue
+import threading
+import time
+
+# Default capacity of the queue in front of each stage
+STAGE_QUEUE_SIZE = 2
+
+_STOP = object()
+
+class Stage:
+    """
+    One pipeline stage: worker thread(s) taking items from a bounded queue.
+
+    func(item) processes an item and returns it (or a new item) for the next
+    stage, or None when the item leaves the pipeline (e.g. it failed and was
+    reported). When the next stage's queue is full the workers block, so a
+    slow stage applies backpressure upstream instead of buffering frames.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=STAGE_QUEUE_SIZE):
+        """
+        Args:
+            name (str): Stage name, used for threads and statistics.
+            func (callable): func(item) -> item for the next stage, or None.
+            workers (int): Number of worker threads.
+            queue_size (int): Capacity of the input queue.
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.next_stage = None
+        # Callable on_error(item, message), called when func raises
+        self.on_error = None
+        self._threads = []
+        self.stopped = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "processed": 0,
+            "failed": 0,
+            "busy": 0,
+            "total_ms": 0.0,
+            "last_ms": 0.0,
+            "max_ms": 0.0,
+            "max_queue_depth": 0,
+            "blocked_ms": 0.0,
+        }
+
+    def start(self):
+        self.stopped = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"Stage-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Let the workers finish the queued items, then stop them.
+
+        Args:
+            timeout (float): Maximum time to wait per worker in seconds (optional, waits
+                for every queued item by default). Items still queued when it expires are
+                dropped and reported through on_error.
+        """
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        if any(thread.is_alive() for thread in self._threads):
+            dropped = self._drop_queued()
+            print(f"[!] {self.name} stage did not stop within {timeout}s, {len(dropped)} queued item(s) dropped")
+            for item in dropped:
+                self._report(item, f"{self.name} stage stopped before processing it")
+        self._threads = []
+        self.stopped = True
+
+    def _drop_queued(self):
+        """Take the queued items out of the queue, leaving the stop markers for the workers."""
+        items, stops = [], 0
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stops += 1
+            else:
+                items.append(item)
+        for _ in range(stops):
+            self.queue.put_nowait(_STOP)
+        return items
+
+    def put(self, item):
+        """Queue an item, blocking while the stage is full (backpressure)."""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            wait_start = time.perf_counter()
+            self.queue.put(item)
+            with self._stats_lock:
+                self._stats["blocked_ms"] += (time.perf_counter() - wait_start) * 1000
+        with self._stats_lock:
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self.queue.qsize())
+
+    def _report(self, item, message):
+        if self.on_error:
+            self.on_error(item, message)
+        else:
+            print(f"[!] {message}")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            with self._stats_lock:
+                self._stats["busy"] += 1
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+                error = None
+            except Exception as e:
+                result = None
+                error = str(e)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self._stats["busy"] -= 1
+                self._stats["failed" if error else "processed"] += 1
+                self._stats["total_ms"] += elapsed_ms
+                self._stats["last_ms"] = elapsed_ms
+                self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+
+            if error is not None:
+                self._report(item, f"{self.name} stage failed: {error}")
+                continue
+            if result is not None and self.next_stage is not None:
+                if self.next_stage.stopped:
+                    # Finished after a stop timeout, once the next stage was already gone
+                    self._report(result, f"{self.next_stage.name} stage stopped before processing it")
+                else:
+                    self.next_stage.put(result)
+
+    def get_stats(self):
+        """
+        Get a snapshot of the stage statistics.
+
+        Returns:
+            dict: name, workers, queue_depth, max_queue_depth, busy workers, processed/failed
+                counts, avg/last/max processing time and time spent blocked on a full queue (ms).
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        done = stats["processed"] + stats["failed"]
+        stats["avg_ms"] = stats.pop("total_ms") / done if done else 0.0
+        stats["name"] = self.name
+        stats["workers"] = self.workers
+        stats["queue_depth"] = self.queue.qsize()
+        return stats
+
+class StagedPipeline:
+    """
+    Chain of Stages connected by bounded queues.
+
+    Each stage runs on its own worker(s), so stage N of part k overlaps
+    stage N-1 of part k+1 and the throughput is set by the slowest stage.
+    """
+
+    def __init__(self, stages, on_error=None):
+        """
+        Args:
+            stages (list): Stages in processing order.
+            on_error (callable): Optional on_error(item, message) for every stage.
+        """
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        for stage in stages:
+            stage.on_error = on_error
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        for stage in self.stages:
+            stage.start()
+        self._running = True
+
+    def stop(self, timeout=None):
+        """
+        Drain the pipeline stage by stage (items already queued are processed), then stop.
+
+        Args:
+            timeout (float): Maximum wait per stage worker (optional, see Stage.stop).
+        """
+        if not self._running:
+            return
+        for stage in self.stages:
+            stage.stop(timeout)
+        self._running = False
+
+    def put(self, item):
+        """Feed an item to the first stage."""
+        self.stages[0].put(item)
+
+    def get_stats(self):
+        """
+        Get the statistics of every stage.
+
+        Returns:
+            list: One dict per stage, in processing order (see Stage.get_stats).
+        """
+        return [stage.get_stats() for stage in self.stages]
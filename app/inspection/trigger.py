@@ -0,0 +1,304 @@
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+from PySide6.QtCore import QObject, Signal
+from app.inspection.metrics import timed
+from app.inspection.pipeline import Stage, StagedPipeline
+from app.model.detector import prepare_inputs, detect_prepared
+from app.model.renderer import get_renderer
+from sqlite_database.src.db_operations import get_scanned_barcode
+from sqlite_database.src.image_store import make_thumbnail
+from sqlite_database.src.image_codec import encode_image, preset_for
+from sqlite_database.src.codec_executor import get_codec_executor
+from sqlite_database.src.persistence_worker import get_persistence_worker
+
+# What starts an inspection: "manual" (Capture button only), "barcode" (every scan)
+# or "hardware" (camera trigger line, one frame per part)
+TRIGGER_MODE = os.environ.get("INSPECTION_TRIGGER", "manual")
+HARDWARE_TRIGGER_LINE = os.environ.get("INSPECTION_TRIGGER_LINE", "Line1")
+
+# Parts allowed between trigger and persistence; further triggers are rejected
+MAX_PARTS_IN_FLIGHT = 8
+# Image encoding is the slowest CPU stage after inference, give it more than one worker
+ENCODE_WORKERS = 2
+
+class Part:
+    """One inspected part, from trigger to persisted record"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, source, trigger_time, barcode=None):
+        self.part_id = next(Part._ids)
+        self.source = source
+        self.trigger_time = trigger_time
+        self.barcode = barcode
+        self.captured_at = None
+        self.frame = None
+        # Model inputs (letterboxed ROI or tiles) with their transforms back to the frame
+        self.inputs = None
+        self.result = None
+        self.annotated = None
+        self.encoded = None
+        self.thumbnails = None
+        self.row_id = None
+
+    def __repr__(self):
+        return f"Part(#{self.part_id}, {self.source}, barcode={self.barcode})"
+
+class InspectionTrigger(QObject):
+    """
+    Trigger-driven, staged inspection pipeline.
+
+    Triggers (Capture button, barcode scans or the camera's hardware trigger)
+    queue parts, which then flow through bounded queues between stages, each
+    on its own worker thread(s):
+
+        capture -> preprocess -> infer -> annotate -> encode -> persist
+
+    Stage N of part k overlaps stage N-1 of part k+1, so the station is bound
+    by its slowest stage (inference) instead of by the sum of all stages.
+    The persist stage is the shared write-behind PersistenceWorker.
+
+    Signals are emitted from the worker threads and delivered queued to the GUI.
+    """
+
+    part_queued = Signal(object)                     # part
+    part_inspected = Signal(object, object, object)  # part, img_with_boxes (pooled: get_renderer().release() it once shown), result_obj
+    part_saved = Signal(object, int)                 # part, row_id
+    part_failed = Signal(object, str)                # part, error message
+    progress_updated = Signal(int)                   # progress of the latest part (0-100)
+
+    def __init__(self, capture_frame, max_in_flight=MAX_PARTS_IN_FLIGHT, encode_workers=ENCODE_WORKERS, parent=None):
+        """
+        Args:
+            capture_frame (callable): capture_frame(trigger_time) -> numpy.ndarray, the frame of a part.
+            max_in_flight (int): Maximum number of parts between trigger and persistence.
+            encode_workers (int): Number of image encoding threads.
+        """
+        super().__init__(parent)
+        self.capture_frame = capture_frame
+        self.max_in_flight = max_in_flight
+
+        self.pipeline = StagedPipeline([
+            # The capture queue holds every part in flight, so trigger() never blocks
+            Stage("capture", self._capture, queue_size=max_in_flight),
+            # So does the preprocess queue: capture never waits on the downstream stages, and the
+            # frame of a part is taken from the camera buffer right after its trigger, before the
+            # ring buffer (a second or so of frames) overwrites it
+            Stage("preprocess", self._preprocess, queue_size=max_in_flight),
+            Stage("infer", self._infer),
+            Stage("annotate", self._annotate),
+            Stage("encode", self._encode, workers=encode_workers),
+        ], on_error=self._finish)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {"triggered": 0, "rejected": 0, "inspected": 0, "saved": 0, "failed": 0}
+
+    def start(self):
+        """Start the stage worker threads."""
+        self.pipeline.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the pipeline after the parts already triggered have gone through every stage.
+
+        Args:
+            timeout (float): Maximum wait per stage worker (optional); parts still queued
+                when it expires are reported through part_failed.
+        """
+        self.pipeline.stop(timeout)
+
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight
+
+    def trigger(self, source="software", barcode=None, trigger_time=None):
+        """
+        Queue a part for inspection (never blocks).
+
+        Args:
+            source (str): "software", "barcode" or "hardware".
+            barcode (str): Barcode of the part (optional, defaults to the last scanned barcode).
+            trigger_time (float): time.monotonic() of the trigger (optional, defaults to now).
+
+        Returns:
+            Part: The queued part, or None if too many parts are already in flight.
+        """
+        part = Part(
+            source,
+            time.monotonic() if trigger_time is None else trigger_time,
+            barcode if barcode is not None else get_scanned_barcode()
+        )
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.stats["rejected"] += 1
+                rejected = True
+            else:
+                self._in_flight += 1
+                self.stats["triggered"] += 1
+                rejected = False
+        if rejected:
+            self.part_failed.emit(part, f"Station busy ({self.max_in_flight} parts in flight), part rejected")
+            return None
+
+        self.pipeline.put(part)
+        self.part_queued.emit(part)
+        return part
+
+    def on_hardware_frame(self, timestamp, frame_id):
+        """Camera frame listener: with a hardware trigger every frame is one part."""
+        self.trigger("hardware", trigger_time=timestamp)
+
+    def get_stage_stats(self):
+        """
+        Get queue depth and timing of every stage, persistence and codec threads included.
+
+        Returns:
+            list: One dict per stage in processing order (see Stage.get_stats).
+        """
+        stats = self.pipeline.get_stats()
+        metrics = get_persistence_worker().get_metrics()
+        batches = metrics["batches"]
+        stats.append({
+            "name": "persist",
+            "workers": 1,
+            "queue_depth": metrics["queue_depth"],
+            "max_queue_depth": metrics["max_queue_depth"],
+            "busy": 0,
+            "processed": metrics["written"],
+            "failed": metrics["failed"],
+            "avg_ms": metrics["total_batch_ms"] / batches if batches else 0.0,
+            "last_ms": metrics["last_batch_ms"],
+            "max_ms": metrics["max_batch_ms"],
+            "blocked_ms": metrics["backpressure_wait_ms"],
+        })
+        # Shared codec threads (encoding of this pipeline, history and export)
+        codec = get_codec_executor().get_stats()
+        done = codec["completed"] + codec["failed"]
+        stats.append({
+            "name": "codec",
+            "workers": codec["workers"],
+            "queue_depth": codec["pending"],
+            "max_queue_depth": codec["max_pending"],
+            "busy": min(codec["pending"], codec["workers"]),
+            "processed": codec["completed"],
+            "failed": codec["failed"],
+            "avg_ms": codec["total_ms"] / done if done else 0.0,
+            "last_ms": 0.0,
+            "max_ms": codec["max_ms"],
+            "blocked_ms": codec["blocked_ms"],
+        })
+        return stats
+
+    def _finish(self, part, error=None):
+        self._release(part)
+        with self._lock:
+            self._in_flight -= 1
+            self.stats["failed" if error else "saved"] += 1
+        if error:
+            self.part_failed.emit(part, error)
+
+    @staticmethod
+    def _release(part):
+        # Frames are only needed until the record is written, the annotated buffer is reused
+        get_renderer().release(part.annotated)
+        part.frame = part.inputs = part.annotated = part.encoded = part.thumbnails = None
+        part.result = None  # Holds the frame too (orig_img)
+
+    # ---- Stages (each returns the part for the next stage, or None once it is finished) ----
+
+    def _capture(self, part):
+        try:
+            with timed("camera_grab"):
+                part.frame = self.capture_frame(part.trigger_time)
+        except Exception as e:
+            self._finish(part, f"Error capturing image: {e}")
+            return None
+        if part.frame is None:
+            self._finish(part, "Failed to capture image.")
+            return None
+        part.captured_at = datetime.now()
+        self.progress_updated.emit(20)
+        return part
+
+    def _preprocess(self, part):
+        with timed("preprocess"):
+            part.inputs = prepare_inputs(part.frame)
+        self.progress_updated.emit(35)
+        return part
+
+    def _infer(self, part):
+        results = detect_prepared(part.inputs, part.frame)
+        part.inputs = None
+        if not results:
+            self._save_uninspected(part, "Detection failed (no model loaded?)")
+            return None
+        part.result = results[0]
+        self.progress_updated.emit(60)
+        return part
+
+    def _annotate(self, part):
+        with timed("annotate"):
+            part.annotated = get_renderer().render_result(part.result, part.frame)
+        with self._lock:
+            self.stats["inspected"] += 1
+        # Emit the verdict first so the operator sees it immediately. The receiver shares the
+        # pooled buffer with the encoder: it is reused once both the receiver and _finish() released it
+        get_renderer().share(part.annotated)
+        self.part_inspected.emit(part, part.annotated, part.result)
+        self.progress_updated.emit(80)
+        return part
+
+    def _encode(self, part):
+        # Both images and both thumbnails are encoded in parallel on the codec threads
+        executor = get_codec_executor()
+        encoded = (executor.submit(self._encode_image, part.frame, "img_raw"),
+                   executor.submit(self._encode_image, part.annotated, "img_detect"))
+        thumbnails = {image_type: executor.submit(self._make_thumbnail, image)
+                      for image_type, image in (("img_raw", part.frame), ("img_detect", part.annotated))}
+        part.encoded = tuple(future.result() for future in encoded)
+        part.thumbnails = {image_type: future.result() for image_type, future in thumbnails.items()}
+        # Persist stage: the write-behind worker only has to write (blocks when its queue is full)
+        get_persistence_worker().submit_insert(
+            part.encoded[0], part.encoded[1], part.result, part.barcode,
+            callback=lambda row_id, part=part: self._on_saved(part, row_id),
+            thumbnails=part.thumbnails, capture_time=part.captured_at
+        )
+        self.progress_updated.emit(100)
+        return None
+
+    @staticmethod
+    def _encode_image(image, image_type):
+        # Codec preset per image type (lossless raw frame, see image_codec.IMAGE_PRESETS)
+        with timed("image_encode"):
+            return encode_image(image, preset_for(image_type))
+
+    @staticmethod
+    def _make_thumbnail(image):
+        with timed("thumbnail"):
+            return make_thumbnail(image)
+
+    def _save_uninspected(self, part, error):
+        # Keep the evidence: the raw frame is persisted with the failure (and no defect) so the part stays traceable
+        def on_saved(row_id):
+            part.row_id = row_id
+            self._finish(part, error if row_id is not None else f"{error}; raw frame not saved")
+            if row_id is not None:
+                self.part_saved.emit(part, row_id)
+        try:
+            get_persistence_worker().submit_insert(
+                part.frame, None, None, part.barcode,
+                callback=on_saved, capture_time=part.captured_at, inspection_error=error
+            )
+        except Exception as e:
+            self._finish(part, f"{error}; raw frame not saved: {e}")
+
+    def _on_saved(self, part, row_id):
+        if row_id is None:
+            self._finish(part, "Error saving detection to database")
+            return
+        part.row_id = row_id
+        self._finish(part)
+        self.part_saved.emit(part, row_id)
@@ -0,0 +1,177 @@
+import threading
+import weakref
+import cv2
+import numpy as np
+from sqlite_database.src.db_operations import extract_detections
+
+# Màu cố định cho từng loại (BGR), để cùng một lỗi luôn cùng một màu trên mọi model
+CLASS_COLORS = {
+    "ok": (80, 175, 76),       # Green
+    "miss": (54, 67, 244),     # Red
+    "lifted": (0, 152, 255),   # Orange
+    "bridge": (176, 39, 156),  # Purple
+}
+# Fallback palette for classes not in CLASS_COLORS, indexed by class ID
+FALLBACK_COLORS = [
+    (255, 56, 56), (255, 157, 151), (255, 112, 31), (255, 178, 29), (207, 210, 49),
+    (72, 249, 10), (146, 204, 23), (61, 219, 134), (26, 147, 52), (0, 212, 187),
+]
+TEXT_COLOR = (255, 255, 255)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Annotated frames kept for reuse (parts in flight + the one on screen)
+DEFAULT_POOL_SIZE = 10
+
+def class_color(class_id, class_name):
+    """Get the BGR colour of a class (fixed per name, palette fallback per ID)."""
+    color = CLASS_COLORS.get(str(class_name).lower())
+    if color is None:
+        color = FALLBACK_COLORS[int(class_id) % len(FALLBACK_COLORS)]
+    return color
+
+class AnnotationRenderer:
+    """
+    Draw detection boxes and labels with OpenCV into reusable frame buffers.
+
+    Replaces Results.plot(): instead of allocating a new full-resolution image
+    and going through the generic plotting path, the frame is copied into a
+    preallocated buffer and only the few boxes and labels are drawn on it.
+    A buffer is handed out by render() and goes back to the pool with
+    release() once the annotated image is no longer used (encoded and shown);
+    share() adds holders, the buffer is then reused after every holder released it.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, show_conf=True):
+        """
+        Args:
+            pool_size (int): Maximum number of buffers kept for reuse.
+            show_conf (bool): Append the confidence to the labels.
+        """
+        self.pool_size = pool_size
+        self.show_conf = show_conf
+        self._free = []
+        self._lock = threading.Lock()
+        # (label, font_scale, thickness) -> text size, labels repeat on every frame
+        self._text_sizes = {}
+        self.buffers_allocated = 0
+        # Shared buffers: id(buffer) -> [weak reference, holders]. Weak, so a buffer a holder
+        # never releases is garbage collected instead of kept here
+        self._holders = {}
+
+    def _acquire(self, frame):
+        with self._lock:
+            while self._free:
+                buffer = self._free.pop()
+                if buffer.shape == frame.shape and buffer.dtype == frame.dtype:
+                    return buffer
+            self.buffers_allocated += 1
+        return np.empty_like(frame)
+
+    def release(self, buffer):
+        """
+        Give an annotated image from render() back to the pool.
+
+        Args:
+            buffer (numpy.ndarray): The image returned by render().
+        """
+        if buffer is None:
+            return
+        with self._lock:
+            entry = self._holders.get(id(buffer))
+            if entry is not None and entry[0]() is buffer:
+                entry[1] -= 1
+                if entry[1] > 0:
+                    return  # Still used by another holder
+                del self._holders[id(buffer)]
+            if len(self._free) < self.pool_size and not any(buffer is free for free in self._free):
+                self._free.append(buffer)
+
+    def share(self, buffer, holders=1):
+        """
+        Add holders to an annotated image from render(), e.g. the GUI next to the encoder.
+
+        Each holder calls release() when done; the buffer goes back to the pool after the last one.
+
+        Args:
+            buffer (numpy.ndarray): The image returned by render().
+            holders (int): Number of extra holders.
+        """
+        with self._lock:
+            # Forget buffers that were garbage collected without being released
+            for key in [key for key, (ref, _) in self._holders.items() if ref() is None]:
+                del self._holders[key]
+            entry = self._holders.get(id(buffer))
+            if entry is None or entry[0]() is not buffer:
+                entry = self._holders[id(buffer)] = [weakref.ref(buffer), 1]
+            entry[1] += holders
+
+    def _text_size(self, label, font_scale, thickness):
+        key = (label, font_scale, thickness)
+        size = self._text_sizes.get(key)
+        if size is None:
+            size = self._text_sizes[key] = cv2.getTextSize(label, FONT, font_scale, thickness)
+        return size
+
+    def render(self, frame, detections):
+        """
+        Draw detections on a copy of a frame.
+
+        Args:
+            frame (numpy.ndarray): The BGR frame (left untouched).
+            detections (list): (class_id, class_name, confidence, x1, y1, x2, y2) tuples,
+                as returned by extract_detections.
+
+        Returns:
+            numpy.ndarray: The annotated image (a pooled buffer, see release()).
+        """
+        annotated = self._acquire(frame)
+        np.copyto(annotated, frame)
+
+        height, width = frame.shape[:2]
+        # Same proportions as ultralytics, so the output looks like plot()
+        line_width = max(round((height + width) / 2 * 0.003), 2)
+        font_thickness = max(line_width - 1, 1)
+        font_scale = line_width / 3
+
+        for class_id, class_name, confidence, x1, y1, x2, y2 in detections:
+            color = class_color(class_id, class_name)
+            p1 = (int(x1), int(y1))
+            p2 = (int(x2), int(y2))
+            cv2.rectangle(annotated, p1, p2, color, line_width, cv2.LINE_AA)
+
+            label = f"{class_name} {confidence:.2f}" if self.show_conf else str(class_name)
+            (text_width, text_height), _ = self._text_size(label, font_scale, font_thickness)
+            # Label above the box, or inside it when the box touches the top edge
+            outside = p1[1] >= text_height + 3
+            label_top = p1[1] - text_height - 3 if outside else p1[1]
+            label_bottom = p1[1] if outside else p1[1] + text_height + 3
+            cv2.rectangle(annotated, (p1[0], label_top), (p1[0] + text_width, label_bottom), color, -1, cv2.LINE_AA)
+            cv2.putText(
+                annotated, label, (p1[0], label_bottom - 2), FONT, font_scale,
+                TEXT_COLOR, font_thickness, cv2.LINE_AA
+            )
+        return annotated
+
+    def render_result(self, result_obj, frame=None):
+        """
+        Draw a YOLO result.
+
+        Args:
+            result_obj: A single YOLO result.
+            frame (numpy.ndarray): The frame to draw on (optional, defaults to result_obj.orig_img).
+
+        Returns:
+            numpy.ndarray: The annotated image (a pooled buffer, see release()).
+        """
+        return self.render(result_obj.orig_img if frame is None else frame, extract_detections(result_obj))
+
+_renderer = AnnotationRenderer()
+
+def get_renderer():
+    """
+    Get the shared annotation renderer.
+
+    Returns:
+        AnnotationRenderer: The application-wide renderer.
+    """
+    return _renderer
@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView, QPushButton,
     QGroupBox, QLabel, QComboBox, QDateEdit, QHeaderView, QSplitter, QMessageBox,
     QDialog, QFileDialog, QFrame, QSizePolicy, QGridLayout, QGraphicsDropShadowEffect
 )
@@ -12,9 +12,12 @@ import os
 from datetime import datetime
 from sqlite_database.src.db_operations import (
     get_defect_types, delete_detection_from_db,
-    get_detections, get_image_data, get_detections_paginated,
-    get_detection_for_export  
+    get_image_data, get_detection_for_export  
 )
+from app.inspection.metrics import timed
+from sqlite_database.src.image_codec import decode_image
+from sqlite_database.src.codec_executor import get_codec_executor
+from app.ui.history_model import DetectionHistoryModel, ThumbnailDelegate, IMAGE_COLUMNS
 from app.ui.styles import HistoryTabStyles
 
 class ImageViewDialog(QDialog):
@@ -50,8 +53,8 @@ class ImageViewDialog(QDialog):
         
         # Convert image data to QPixmap
         if isinstance(image_data, bytes):
-            nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            with timed("decode"):
+                img = decode_image(image_data)
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             height, width, channel = img.shape
             bytes_per_line = 3 * width
@@ -96,31 +99,8 @@ class ImageViewDialog(QDialog):
             pixmap.save(file_name)
             QMessageBox.information(self, "Success", f"Image saved to {file_name}")
 
-class ClickableImageLabel(QLabel):
-    """Custom QLabel that emits signals on double-click"""
-    double_clicked = Signal(int, str)  # row_id, image_type
-    
-    def __init__(self, row_id, image_type, parent=None):
-        super().__init__(parent)
-        self.row_id = row_id
-        self.image_type = image_type
-        self.setAlignment(Qt.AlignCenter)
-        self.setStyleSheet(HistoryTabStyles.get_image_thumbnail_style())
-        
-        # Set cursor pointer để cho biết có thể click
-        self.setCursor(Qt.PointingHandCursor)
-        
-        # Add tooltip to indicate double-click functionality
-        self.setToolTip("Double-click to view full image")
-        
-    def mouseDoubleClickEvent(self, event):
-        """Handle double-click event"""
-        if event.button() == Qt.LeftButton:
-            self.double_clicked.emit(self.row_id, self.image_type)
-        super().mouseDoubleClickEvent(event)
-
 class DetectionHistoryTab(QWidget):
-    """Enhanced tab for viewing detection history with pagination"""
+    """Enhanced tab for viewing detection history (rows fetched on demand while scrolling)"""
     
     refresh_signal = Signal()
     
@@ -128,16 +108,23 @@ class DetectionHistoryTab(QWidget):
         super().__init__(parent)
         self.parent = parent
         
-        # Pagination variables
-        self.current_page = 1
-        self.page_size = 10  # 10 records per page
-        self.total_records = 0
-        self.total_pages = 0
+        # Virtual model: rows and thumbnails are loaded in background as the table scrolls
+        self.history_model = DetectionHistoryModel(self)
+        self.history_model.total_changed.connect(self.update_records_info)
+        self.history_model.rows_fetched.connect(self.update_records_info)
+        self.history_model.defect_types_loaded.connect(self.populate_defect_types)
+        self.history_model.load_failed.connect(self.on_load_failed)
+        
+        # New records saved while the tab is hidden: reload once when it is shown again
+        self.needs_refresh = False
+        
+        # Defect names currently shown in the filter combo
+        self.defect_types = []
         
         self.initUI()
         
     def initUI(self):
-        """Initialize enhanced UI components with pagination"""
+        """Initialize enhanced UI components"""
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(16, 16, 16, 16)  # Giảm từ 24 xuống 16
         main_layout.setSpacing(12)  # Giảm từ 20 xuống 12
@@ -204,7 +191,7 @@ class DetectionHistoryTab(QWidget):
         
         # Apply filter button
         self.apply_filter_btn = QPushButton("Apply")  # Rút gọn text
-        self.apply_filter_btn.clicked.connect(self.refresh_data)
+        self.apply_filter_btn.clicked.connect(self.apply_filters)
         filter_layout.addWidget(self.apply_filter_btn)
         
         filter_layout.addStretch()  # Push everything to left
@@ -215,16 +202,18 @@ class DetectionHistoryTab(QWidget):
         main_content_splitter = QSplitter(Qt.Horizontal)
         main_content_splitter.setChildrenCollapsible(False)
         
-        # === LEFT SIDE: Table và Pagination ===
+        # === LEFT SIDE: Table và records info ===
         left_container = QWidget()
         left_layout = QVBoxLayout(left_container)
         left_layout.setContentsMargins(0, 0, 10, 0)
         left_layout.setSpacing(8)  # Giảm spacing
         
         # Table với chiều cao lớn hơn
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(6)
-        self.history_table.setHorizontalHeaderLabels(["#", "Date/Time", "Raw Image", "Detection Image", "Defects", "Barcode"])
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
+        thumbnail_delegate = ThumbnailDelegate(self.history_table)
+        for col in IMAGE_COLUMNS:
+            self.history_table.setItemDelegateForColumn(col, thumbnail_delegate)
         
         header = self.history_table.horizontalHeader()
         
@@ -247,7 +236,11 @@ class DetectionHistoryTab(QWidget):
         header.setSectionResizeMode(5, QHeaderView.Stretch)
         
         self.history_table.verticalHeader().setVisible(False)
-        self.history_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # Fixed row height (70px để chứa defects dài) so the view never measures rows
+        self.history_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.history_table.verticalHeader().setDefaultSectionSize(70)
+        self.history_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.history_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.history_table.setAlternatingRowColors(True)
         
         # Sử dụng expanded table style để có thêm chiều cao
@@ -255,68 +248,18 @@ class DetectionHistoryTab(QWidget):
         
         left_layout.addWidget(self.history_table)
         
-        # === COMPACT Pagination Controls ===
+        # === COMPACT Records info (replaces page navigation: scroll to load more) ===
         pagination_frame = QFrame()
         pagination_frame.setStyleSheet(HistoryTabStyles.get_compact_pagination_frame_style())
         pagination_layout = QHBoxLayout(pagination_frame)
         pagination_layout.setSpacing(8)
         pagination_layout.setContentsMargins(8, 4, 8, 4)  # Giảm margins
         
-        # Records info - compact
-        self.records_info_label = QLabel("Showing 0-0 of 0 records")
+        self.records_info_label = QLabel("Loaded 0 of 0 records")
         self.records_info_label.setStyleSheet(HistoryTabStyles.get_compact_pagination_records_info_style())
         pagination_layout.addWidget(self.records_info_label)
-        
         pagination_layout.addStretch()
         
-        # Navigation buttons - compact với chỉ icon
-        nav_layout = QHBoxLayout()
-        nav_layout.setSpacing(4)  # Giảm spacing
-        
-        self.first_page_btn = QPushButton("⏮️")  # Chỉ icon
-        self.first_page_btn.clicked.connect(self.go_to_first_page)
-        
-        self.prev_page_btn = QPushButton("⬅️")  # Chỉ icon
-        self.prev_page_btn.clicked.connect(self.go_to_previous_page)
-        
-        self.page_info_label = QLabel("Page 1 of 1")
-        self.page_info_label.setStyleSheet(HistoryTabStyles.get_compact_pagination_page_info_style())
-        
-        self.next_page_btn = QPushButton("➡️")  # Chỉ icon
-        self.next_page_btn.clicked.connect(self.go_to_next_page)
-        
-        self.last_page_btn = QPushButton("⏭️")  # Chỉ icon
-        self.last_page_btn.clicked.connect(self.go_to_last_page)
-        
-        # Apply compact pagination button style
-        for btn in [self.first_page_btn, self.prev_page_btn, self.next_page_btn, self.last_page_btn]:
-            btn.setStyleSheet(HistoryTabStyles.get_compact_pagination_button_style())
-        
-        nav_layout.addWidget(self.first_page_btn)
-        nav_layout.addWidget(self.prev_page_btn)
-        nav_layout.addWidget(self.page_info_label)
-        nav_layout.addWidget(self.next_page_btn)
-        nav_layout.addWidget(self.last_page_btn)
-        
-        pagination_layout.addLayout(nav_layout)
-        pagination_layout.addStretch()
-        
-        # Page size selector - compact
-        page_size_layout = QHBoxLayout()
-        
-        show_label = QLabel("Show:")
-        show_label.setStyleSheet(HistoryTabStyles.get_compact_pagination_label_style())
-        page_size_layout.addWidget(show_label)
-        
-        self.page_size_combo = QComboBox()
-        self.page_size_combo.addItems(["5", "10", "20", "50"])
-        self.page_size_combo.setCurrentText("10")
-        self.page_size_combo.currentTextChanged.connect(self.on_page_size_changed)
-        self.page_size_combo.setStyleSheet(HistoryTabStyles.get_compact_pagination_combo_style())
-        page_size_layout.addWidget(self.page_size_combo)
-        
-        pagination_layout.addLayout(page_size_layout)
-        
         left_layout.addWidget(pagination_frame)
         
         # === RIGHT SIDE: Details Panel - giữ nguyên ===
@@ -407,164 +350,41 @@ class DetectionHistoryTab(QWidget):
         main_layout.addWidget(main_content_splitter)
         
         # Connect signals
-        self.history_table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.history_table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.history_table.doubleClicked.connect(self.on_table_double_clicked)
         
-        # Initialize data
-        self.populate_defect_types()
+        # Initialize data (defect types arrive with the first page)
         self.refresh_data()
     
     def refresh_data(self):
-        """Refresh data with pagination"""
-        try:
-            date_from = self.date_from.date().toString("yyyy-MM-dd")
-            date_to = self.date_to.date().addDays(1).toString("yyyy-MM-dd")
-            defect_filter = self.defect_combo.currentText()
-            
-            # Get paginated data
-            rows, total_count = get_detections_paginated(
-                date_from, date_to, defect_filter, 
-                self.current_page, self.page_size
-            )
-            
-            # Update pagination info
-            self.total_records = total_count
-            self.total_pages = (total_count + self.page_size - 1) // self.page_size if total_count > 0 else 1
-            
-            # Clear table
-            self.history_table.setRowCount(0)
-            
-            # Populate table with serial numbers
-            for i, row in enumerate(rows):
-                rowid, time_str, img_raw, img_detect, defect, barcode = row
-                
-                self.history_table.insertRow(i)
-                self.history_table.setRowHeight(i, 70)  # Tăng chiều cao row lên 70px để chứa defects dài
-                
-                # SERIAL NUMBER (hiển thị) - tính từ trang hiện tại
-                serial_number = (self.current_page - 1) * self.page_size + i + 1
-                serial_item = QTableWidgetItem(str(serial_number))
-                serial_item.setTextAlignment(Qt.AlignCenter)
-                # LƯU DATABASE ID VÀO DATA ROLE để dùng cho delete
-                serial_item.setData(Qt.UserRole, rowid)  # Store real database ID
-                self.history_table.setItem(i, 0, serial_item)
-                
-                # Time - HIỂN THỊ ĐẦY ĐỦ HƠN
-                time_parts = time_str.split(' ')
-                if len(time_parts) >= 2:
-                    time_display = time_parts[1][:8]  # Lấy HH:MM:SS thay vì chỉ HH:MM
-                else:
-                    time_display = time_str[-8:]  # Lấy 8 ký tự cuối
-                
-                time_item = QTableWidgetItem(time_display)
-                time_item.setTextAlignment(Qt.AlignCenter)
-                time_item.setToolTip(time_str)  # Full timestamp trong tooltip
-                self.history_table.setItem(i, 1, time_item)
-                
-                # Images with double-click - TĂNG KÍCH THƯỚC ẢNH
-                for col, img_data, img_type in [(2, img_raw, "img_raw"), (3, img_detect, "img_detect")]:
-                    if img_data:
-                        nparr = np.frombuffer(img_data, np.uint8)
-                        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                        img = cv2.resize(img, (90, 60))  # Tăng từ (70, 50) lên (90, 60) để fit 100px column
-                        height, width, channel = img.shape
-                        bytes_per_line = 3 * width
-                        q_img = QImage(img.data, width, height, bytes_per_line, QImage.Format_RGB888)
-                        pixmap = QPixmap.fromImage(q_img)
-                        
-                        lbl = ClickableImageLabel(rowid, img_type)  # Vẫn dùng database ID
-                        lbl.setPixmap(pixmap)
-                        lbl.double_clicked.connect(self.on_image_double_clicked)
-                        
-                        self.history_table.setCellWidget(i, col, lbl)
-                    else:
-                        self.history_table.setItem(i, col, QTableWidgetItem("No image"))
-                
-                # Defects 
-                defect_display = defect if defect else "No defects"
-                
-                defect_item = QTableWidgetItem(defect_display)
-                defect_item.setToolTip(defect if defect else "No defects")
-                
-                if defect and defect.lower() != "no defects":
-                    defect_item.setBackground(QColor(255, 235, 238))
-                    defect_item.setForeground(QColor(183, 28, 28))
-                else:
-                    defect_item.setBackground(QColor(232, 245, 233))
-                    defect_item.setForeground(QColor(46, 125, 50))
-                
-                self.history_table.setItem(i, 4, defect_item)
-                
-                # Barcode - HIỂN THỊ ĐẦY ĐỦ HƠN VÌ CÓ STRETCH
-                barcode_display = barcode if barcode else "N/A"
-                barcode_item = QTableWidgetItem(barcode_display)
-                barcode_item.setTextAlignment(Qt.AlignCenter)
-                barcode_item.setToolTip(barcode if barcode else "No barcode")
-                self.history_table.setItem(i, 5, barcode_item)
-            
-            # Update pagination controls
-            self.update_pagination_controls();
-            
-            # Update parent status
-            if hasattr(self.parent, 'status_message'):
-                start_record = (self.current_page - 1) * self.page_size + 1 if self.total_records > 0 else 0
-                end_record = min(self.current_page * self.page_size, self.total_records)
-                self.parent.status_message.setText(
-                    f"📊 Showing {start_record}-{end_record} of {self.total_records} records (Page {self.current_page}/{self.total_pages})"
-                )
-            
-            self.reset_details()
-            self.populate_defect_types()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Database Error", f"Error loading detection history: {str(e)}")
-    
-    def update_pagination_controls(self):
-        """Update pagination button states and labels"""
-        # Update page info
-        self.page_info_label.setText(f"Page {self.current_page} of {self.total_pages}")
-        
-        # Update records info
-        start_record = (self.current_page - 1) * self.page_size + 1 if self.total_records > 0 else 0
-        end_record = min(self.current_page * self.page_size, self.total_records)
-        self.records_info_label.setText(f"Showing {start_record}-{end_record} of {self.total_records} records")
-        
-        # Update button states
-        self.first_page_btn.setEnabled(self.current_page > 1)
-        self.prev_page_btn.setEnabled(self.current_page > 1)
-        self.next_page_btn.setEnabled(self.current_page < self.total_pages)
-        self.last_page_btn.setEnabled(self.current_page < self.total_pages)
-    
-    # Pagination navigation methods
-    def go_to_first_page(self):
-        """Go to first page"""
-        if self.current_page != 1:
-            self.current_page = 1
-            self.refresh_data()
+        """Reload the history from the newest record with the current filters (in background)"""
+        self.needs_refresh = False
+        self.history_model.set_filters(
+            self.date_from.date().toString("yyyy-MM-dd"),
+            self.date_to.date().addDays(1).toString("yyyy-MM-dd"),
+            self.defect_combo.currentText()
+        )
+        self.reset_details()
     
-    def go_to_previous_page(self):
-        """Go to previous page"""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.refresh_data()
+    def cancel_loading(self, timeout_ms=2000):
+        """Cancel pending history loads and wait for the loader thread (call on shutdown)"""
+        self.history_model.cancel_loading(timeout_ms)
     
-    def go_to_next_page(self):
-        """Go to next page"""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.refresh_data()
+    @Slot(str)
+    def on_load_failed(self, message):
+        QMessageBox.warning(self, "Database Error", f"Error loading detection history: {message}")
     
-    def go_to_last_page(self):
-        """Go to last page"""
-        if self.current_page != self.total_pages:
-            self.current_page = self.total_pages
-            self.refresh_data()
+    @Slot()
+    def update_records_info(self, *_):
+        """Update the loaded/total records label and the parent status"""
+        loaded = self.history_model.rowCount()
+        total = self.history_model.total
+        self.records_info_label.setText(f"Loaded {loaded} of {total} records")
+        if hasattr(self.parent, 'status_message'):
+            self.parent.status_message.setText(f"📊 Showing {loaded} of {total} records (scroll to load more)")
     
-    @Slot(str)
-    def on_page_size_changed(self, new_size):
-        """Handle page size change"""
-        self.page_size = int(new_size)
-        self.current_page = 1  # Reset to first page
+    def apply_filters(self):
+        """Apply filters and go back to the newest records"""
         self.refresh_data()
     
     def set_date_range(self, days_back):
@@ -572,7 +392,6 @@ class DetectionHistoryTab(QWidget):
         today = QDate.currentDate()
         self.date_to.setDate(today)
         self.date_from.setDate(today.addDays(-days_back))
-        self.current_page = 1  # Reset to first page when filter changes
         self.refresh_data()
     
     # Thêm method mới
@@ -580,22 +399,16 @@ class DetectionHistoryTab(QWidget):
         """Show all records regardless of date"""
         self.date_from.setDate(QDate(1900, 1, 1))  # Very old date
         self.date_to.setDate(QDate(2099, 12, 31))   # Very future date
-        self.current_page = 1  # Reset to first page
         self.refresh_data()
     
     def delete_detection(self):
-        """Delete selected detection from database and refresh current page"""
+        """Delete selected detection from database and remove it from the table"""
         database_id = self.get_selected_row_id()
         if database_id is None:
             return
         
         # Get serial number for display
-        selected_items = self.history_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            serial_number = self.history_table.item(row, 0).text()
-        else:
-            serial_number = "Unknown"
+        serial_number = self.get_selected_serial_number()
             
         reply = QMessageBox.question(
             self, "Confirm Deletion",
@@ -606,15 +419,10 @@ class DetectionHistoryTab(QWidget):
         if reply == QMessageBox.Yes:
             try:
                 delete_detection_from_db(database_id)  # Use real database ID
+                self.history_model.remove_record(database_id)
                 
                 if hasattr(self.parent, 'status_message'):
                     self.parent.status_message.setText(f"🗑️ Detection #{serial_number} deleted (DB ID: {database_id})")
-                
-                # Check if current page becomes empty after deletion
-                if self.history_table.rowCount() == 1 and self.current_page > 1:
-                    self.current_page -= 1  # Go to previous page if current page becomes empty
-                
-                self.refresh_data()
             except Exception as e:
                 QMessageBox.warning(self, "Delete Error", f"Error deleting detection: {str(e)}")
     
@@ -631,21 +439,28 @@ class DetectionHistoryTab(QWidget):
         for btn in self.action_buttons:
             btn.setEnabled(False)
     
+    def get_selected_row(self):
+        """Get the index of the selected table row, or None"""
+        selected_rows = self.history_table.selectionModel().selectedRows()
+        return selected_rows[0].row() if selected_rows else None
+    
     def get_selected_row_id(self):
-        """Get the real database ID from selected row (stored in UserRole)"""
-        selected_items = self.history_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            # Lấy database ID từ UserRole của cột đầu tiên
-            id_item = self.history_table.item(row, 0)
-            if id_item:
-                return id_item.data(Qt.UserRole)  # Returns real database rowid
-        return None
+        """Get the real database ID from selected row (model UserRole)"""
+        row = self.get_selected_row()
+        if row is None:
+            return None
+        return self.history_model.index(row, 0).data(Qt.UserRole)  # Returns real database rowid
+    
+    def get_selected_serial_number(self):
+        """Get the displayed serial number of the selected row"""
+        row = self.get_selected_row()
+        return str(row + 1) if row is not None else "Unknown"
     
     def get_image_data(self, row_id, image_type):
         """Get image data from database."""
         try:
-            return get_image_data(row_id, image_type)
+            with timed("db_read"):
+                return get_image_data(row_id, image_type)
         except Exception as e:
             QMessageBox.warning(self, "Database Error", f"Error retrieving image: {str(e)}")
             return None
@@ -658,12 +473,7 @@ class DetectionHistoryTab(QWidget):
             return
         
         # Get serial number for display
-        selected_items = self.history_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            serial_number = self.history_table.item(row, 0).text()
-        else:
-            serial_number = "Unknown"
+        serial_number = self.get_selected_serial_number()
             
         try:
             # SỬ DỤNG FUNCTION MỚI TỪ DB_OPERATIONS
@@ -688,18 +498,23 @@ class DetectionHistoryTab(QWidget):
             safe_time = time_str.replace(":", "-").replace(" ", "_")
             filename_base = f"detection_serial_{serial_number}_db_{database_id}_{safe_time}"
             
-            # Export images
+            # Export images (decoded and written in parallel on the codec threads)
             exported_files = []
+            executor = get_codec_executor()
+            saving = []
             
             if img_raw:
                 raw_path = os.path.join(export_dir, f"{filename_base}_raw.png")
-                self.save_image_data(img_raw, raw_path)
+                saving.append(executor.submit(self.save_image_data, img_raw, raw_path))
                 exported_files.append(f"{filename_base}_raw.png")
                 
             if img_detect:
                 detect_path = os.path.join(export_dir, f"{filename_base}_detect.png")
-                self.save_image_data(img_detect, detect_path)
+                saving.append(executor.submit(self.save_image_data, img_detect, detect_path))
                 exported_files.append(f"{filename_base}_detect.png")
+            
+            for future in saving:
+                future.result()
                 
             # Export info file
             info_path = os.path.join(export_dir, f"{filename_base}_info.txt")
@@ -737,26 +552,19 @@ class DetectionHistoryTab(QWidget):
     
     def save_image_data(self, img_data, filepath):
         """Save image data to file"""
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        img = decode_image(img_data)
         cv2.imwrite(filepath, img)
     
-    def on_selection_changed(self):
+    def on_selection_changed(self, *_):
         """Handle table selection change"""
-        selected_items = self.history_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            
+        row = self.get_selected_row()
+        record = self.history_model.record(row) if row is not None else None
+        if record:
             # Get data from selected row
-            id_item = self.history_table.item(row, 0)
-            serial_number = id_item.text()  # Serial number for display
-            database_id = id_item.data(Qt.UserRole)  # Real database ID
-            
-            time_str = self.history_table.item(row, 1).toolTip()  # Full timestamp from tooltip
-            defect_item = self.history_table.item(row, 4)
-            defect = defect_item.toolTip() if defect_item else "No defects"
-            barcode_item = self.history_table.item(row, 5)
-            barcode = barcode_item.toolTip() if barcode_item else "No barcode"
+            serial_number = str(row + 1)  # Serial number for display
+            _, time_str, _, _, defect, barcode, _ = record
+            defect = defect or "No defects"
+            barcode = barcode or "No barcode"
             
             # Update detail labels với serial number
             self.details_defect.setText(f"🔧 Defect: {defect}")
@@ -778,6 +586,13 @@ class DetectionHistoryTab(QWidget):
         else:
             self.reset_details()
     
+    def on_table_double_clicked(self, index):
+        """Open the full image when a thumbnail cell is double-clicked"""
+        image_type = IMAGE_COLUMNS.get(index.column())
+        record = self.history_model.record(index.row())
+        if image_type and record and record[2 if image_type == "img_raw" else 3]:
+            self.on_image_double_clicked(record[0], image_type)
+    
     def on_image_double_clicked(self, row_id, image_type):
         """Handle image double-click to show full view"""
         try:
@@ -791,27 +606,24 @@ class DetectionHistoryTab(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error loading image: {str(e)}")
     
-    def populate_defect_types(self):
-        """Populate defect type combo box"""
+    @Slot(object)
+    def populate_defect_types(self, defect_types=None):
+        """Populate defect type combo box from the in-memory defect catalog"""
         try:
+            if defect_types is None:
+                defect_types = get_defect_types()
+            # Rebuild the combo only when the catalog changed
+            if defect_types == self.defect_types:
+                return
+            self.defect_types = list(defect_types)
             current_selection = self.defect_combo.currentText()
             self.defect_combo.clear()
             self.defect_combo.addItem("All")
+            # Passed parts have no detection_defects rows, the filter matches them on the defect column
+            self.defect_combo.addItem("No defects")
             
-            defect_types = get_defect_types()
-            unique_defects = set()
-            
-            for row in defect_types:
-                defect = row[0]
-                if defect and defect.strip():
-                    # Split multiple defects and add each
-                    for single_defect in defect.split(','):
-                        single_defect = single_defect.strip()
-                        if single_defect and single_defect not in unique_defects:
-                            unique_defects.add(single_defect)
-            
-            # Add sorted unique defects
-            for defect in sorted(unique_defects):
+            # Already distinct and sorted by the defect index
+            for defect in defect_types:
                 self.defect_combo.addItem(defect)
             
             # Restore previous selection if it exists
@@ -824,45 +636,21 @@ class DetectionHistoryTab(QWidget):
     
     def add_new_record(self, row_id):
         """
-        Thêm record mới vào đầu table thay vì refresh toàn bộ
+        Thêm record mới vào table thay vì refresh toàn bộ
+        
+        The record is inserted on top if it matches the active filters. When the tab
+        is hidden nothing is loaded now; the tab reloads once when shown again.
         
         Args:
             row_id (int): ID của record mới được tạo
         """
-        try:
-            from sqlite_database.src.db_operations import get_detection_summary
-            
-            # Lấy thông tin record mới
-            record_data = get_detection_summary(row_id)
-            if not record_data:
-                print(f"Cannot find record {row_id}")
-                return
-            
-            time_str, defect, barcode = record_data
-            
-            # Thêm row mới vào đầu table
-            self.history_table.insertRow(0)
-            
-            # Set data cho row mới
-            self.history_table.setItem(0, 0, QTableWidgetItem(str(row_id)))
-            self.history_table.setItem(0, 1, QTableWidgetItem(time_str))
-            self.history_table.setItem(0, 2, QTableWidgetItem(defect or "No defects"))
-            self.history_table.setItem(0, 3, QTableWidgetItem(barcode or "N/A"))
-            
-            # Highlight row mới với màu khác biệt
-            for col in range(self.history_table.columnCount()):
-                item = self.history_table.item(0, col)
-                if item:
-                    item.setBackground(QColor(230, 247, 255))  # Light blue highlight
-            
-            # Cập nhật pagination info
-            if hasattr(self, 'records_info_label'):
-                current_count = self.history_table.rowCount()
-                self.records_info_label.setText(f"📊 Total: {current_count} records")
-            
-            print(f"✅ Record {row_id} added to history table")
-            
-        except Exception as e:
-            print(f"Error adding new record: {e}")
-            # Fallback to full refresh nếu có lỗi
-            self.refresh_data()
\ No newline at end of file
+        if not self.isVisible():
+            self.needs_refresh = True
+            return
+        self.history_model.add_record(row_id)
+    
+    def showEvent(self, event):
+        """Catch up on records saved while the tab was hidden"""
+        super().showEvent(event)
+        if self.needs_refresh:
+            self.refresh_data()
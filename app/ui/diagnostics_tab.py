@@ -0,0 +1,139 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QFrame,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox
+)
+from PySide6.QtCore import Qt, QTimer
+from datetime import datetime
+from app.inspection.metrics import get_latency_metrics, WINDOW_SIZE
+from app.ui.styles import HistoryTabStyles
+
+LATENCY_COLUMNS = ["Stage", "Count", "Last", "Mean", "p50", "p95", "p99", "Max"]
+PIPELINE_COLUMNS = ["Stage", "Workers", "Queue", "Max queue", "Busy", "Done", "Failed", "Avg ms", "Max ms", "Blocked ms"]
+
+# Refresh period of the live tables (only while the tab is visible)
+REFRESH_INTERVAL_MS = 1000
+
+class DiagnosticsTab(QWidget):
+    """Live per-stage latency percentiles and pipeline queue depths"""
+
+    def __init__(self, stage_stats=None, parent=None):
+        """
+        Args:
+            stage_stats (callable): Optional callable returning the pipeline stage statistics
+                (InspectionTrigger.get_stage_stats).
+        """
+        super().__init__(parent)
+        self.stage_stats = stage_stats
+        self.metrics = get_latency_metrics()
+        self.initUI()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(REFRESH_INTERVAL_MS)
+
+    def initUI(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(16, 16, 16, 16)
+        main_layout.setSpacing(12)
+
+        # === Header ===
+        header_frame = QFrame()
+        header_frame.setStyleSheet(HistoryTabStyles.get_compact_header_frame_style())
+        header_layout = QHBoxLayout(header_frame)
+        header_layout.setContentsMargins(12, 8, 12, 8)
+        title_label = QLabel("🩺 Diagnostics")
+        title_label.setStyleSheet(HistoryTabStyles.get_compact_header_title_style())
+        header_layout.addWidget(title_label)
+        header_layout.addStretch()
+
+        for text, func in [("Export CSV", lambda: self.export_metrics("csv")),
+                           ("Export JSON", lambda: self.export_metrics("json")),
+                           ("Reset", self.reset_metrics)]:
+            btn = QPushButton(text)
+            btn.clicked.connect(func)
+            btn.setStyleSheet(HistoryTabStyles.get_compact_quick_filter_button_style())
+            header_layout.addWidget(btn)
+        main_layout.addWidget(header_frame)
+
+        # === Stage latency ===
+        latency_group = QGroupBox(f"⏱️ Stage latency (ms, last {WINDOW_SIZE} samples per stage)")
+        latency_group.setStyleSheet(HistoryTabStyles.get_compact_filter_group_style())
+        latency_layout = QVBoxLayout(latency_group)
+        self.latency_table = self._create_table(LATENCY_COLUMNS)
+        latency_layout.addWidget(self.latency_table)
+        main_layout.addWidget(latency_group, 3)
+
+        # === Pipeline queues ===
+        pipeline_group = QGroupBox("⚙️ Pipeline stages")
+        pipeline_group.setStyleSheet(HistoryTabStyles.get_compact_filter_group_style())
+        pipeline_layout = QVBoxLayout(pipeline_group)
+        self.pipeline_table = self._create_table(PIPELINE_COLUMNS)
+        pipeline_layout.addWidget(self.pipeline_table)
+        main_layout.addWidget(pipeline_group, 2)
+
+    @staticmethod
+    def _create_table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionMode(QAbstractItemView.NoSelection)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setStyleSheet(HistoryTabStyles.get_expanded_table_style())
+        return table
+
+    @staticmethod
+    def _fill_table(table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if isinstance(value, float):
+                    text = f"{value:.1f}"
+                else:
+                    text = str(value)
+                item = table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    item.setTextAlignment(Qt.AlignCenter)
+                    table.setItem(row, column, item)
+                item.setText(text)
+
+    def refresh(self):
+        """Update both tables (skipped while the tab is hidden)."""
+        if not self.isVisible():
+            return
+        self._fill_table(self.latency_table, [
+            [row["stage"], row["count"], row["last"], row["mean"], row["p50"], row["p95"], row["p99"], row["max"]]
+            for row in self.metrics.summary()
+        ])
+        if self.stage_stats is not None:
+            self._fill_table(self.pipeline_table, [
+                [stage["name"], stage["workers"], stage["queue_depth"], stage["max_queue_depth"], stage["busy"],
+                 stage["processed"], stage["failed"], stage["avg_ms"], stage["max_ms"], stage["blocked_ms"]]
+                for stage in self.stage_stats()
+            ])
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def export_metrics(self, fmt):
+        """Dump the latency summary to a CSV or JSON file chosen by the user"""
+        default_name = f"latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export Latency Metrics", default_name,
+            "CSV Files (*.csv)" if fmt == "csv" else "JSON Files (*.json)"
+        )
+        if not file_name:
+            return
+        if not file_name.lower().endswith(f".{fmt}"):
+            file_name += f".{fmt}"
+        try:
+            self.metrics.dump(file_name)
+            QMessageBox.information(self, "Success", f"Latency metrics exported to {file_name}")
+        except Exception as e:
+            QMessageBox.warning(self, "Export Error", f"Error exporting metrics: {str(e)}")
+
+    def reset_metrics(self):
+        self.metrics.reset()
+        self.refresh()
@@ -0,0 +1,134 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+from PySide6.QtGui import QImage
+from app.inspection.metrics import timed
+from sqlite_database.src.codec_executor import get_codec_executor
+from sqlite_database.src.db_operations import (
+    get_defect_types, get_thumbnails, get_detections_page, count_detections,
+    get_detection_record
+)
+
+class HistoryLoaderSignals(QObject):
+    """Signals of the history loader tasks (delivered queued to the GUI thread)"""
+    rows_loaded = Signal(int, object)        # generation, chunk
+    record_loaded = Signal(int, object)      # generation, newly saved record
+    thumbnails_loaded = Signal(int, object)  # generation, {(row_id, image_type): QImage}
+    load_failed = Signal(int, str)           # generation, error message
+    thumbnails_failed = Signal(object, str)  # requested (row_id, image_type) keys, error message
+
+def load_history_rows(request, is_cancelled=None):
+    """
+    Load the next chunk of history rows after a keyset cursor.
+
+    Args:
+        request (dict): date_from, date_to, defect_filter, limit, cursor (ts, id) and
+            with_count (also load the total count and the defect types).
+        is_cancelled (callable): Optional callback returning True once the result is no longer wanted.
+
+    Returns:
+        dict: rows (metadata only, newest first), total and defect_types (None unless
+            with_count), or None if the load was cancelled.
+    """
+    total = defect_types = None
+    if request["with_count"]:
+        # Total count is cached and maintained incrementally by db_operations
+        with timed("db_read"):
+            total = count_detections(request["date_from"], request["date_to"], request["defect_filter"])
+        defect_types = get_defect_types()
+        if is_cancelled and is_cancelled():
+            return None
+
+    with timed("db_read"):
+        rows = get_detections_page(
+            request["date_from"], request["date_to"], request["defect_filter"],
+            request["limit"], request["cursor"]
+        )
+    return {"rows": rows, "total": total, "defect_types": defect_types}
+
+def load_history_record(row_id, filters):
+    """
+    Load a newly saved record for an incremental update of the history view.
+
+    Args:
+        row_id (int): The ID of the detection record.
+        filters (tuple): (date_from, date_to, defect_filter) of the view.
+
+    Returns:
+        dict: row_id, record (None if it does not match the filters) and the defect_types catalog.
+    """
+    return {
+        "row_id": row_id,
+        "record": get_detection_record(row_id, *filters),
+        "defect_types": get_defect_types(),
+    }
+
+def load_thumbnails(keys):
+    """
+    Fetch and decode thumbnails, one query per image type.
+
+    Safe to call from a worker thread: only QImage (not QPixmap) is created here.
+
+    Args:
+        keys (iterable): (row_id, image_type) pairs.
+
+    Returns:
+        dict: Mapping of every requested (row_id, image_type) to a QImage, or None if the
+            record has no readable image.
+    """
+    images = dict.fromkeys(keys)
+    executor = get_codec_executor()
+    decoding = {}
+    for img_type in ("img_raw", "img_detect"):
+        row_ids = [row_id for row_id, key_type in keys if key_type == img_type]
+        with timed("db_read"):
+            thumbnails = get_thumbnails(row_ids, img_type)
+        # Decode the whole page in parallel on the codec threads
+        for row_id, data in thumbnails.items():
+            decoding[(row_id, img_type)] = executor.submit(_decode_thumbnail, data)
+    for key, future in decoding.items():
+        image = future.result()
+        if not image.isNull():
+            images[key] = image
+    return images
+
+def _decode_thumbnail(data):
+    with timed("decode"):
+        return QImage.fromData(data)
+
+class HistoryTask(QRunnable):
+    """Run one history loader function on a QThreadPool thread and emit its result"""
+
+    def __init__(self, generation, func, args, done_signal, failed_signal, is_cancelled=None):
+        super().__init__()
+        self.generation = generation
+        self.func = func
+        self.args = args
+        self.done_signal = done_signal
+        self.failed_signal = failed_signal
+        self.is_cancelled = is_cancelled or (lambda: False)
+
+    def run(self):
+        # Superseded before it started (e.g. filters changed again)
+        if self.is_cancelled():
+            return
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.failed_signal.emit(self.generation, str(e))
+            return
+        if result is not None and not self.is_cancelled():
+            self.done_signal.emit(self.generation, result)
+
+class ThumbnailTask(HistoryTask):
+    """Load a batch of thumbnails; a failure reports the requested keys instead of a row-load error"""
+
+    def __init__(self, generation, keys, done_signal, failed_signal):
+        super().__init__(generation, load_thumbnails, (keys,), done_signal, failed_signal)
+        self.keys = keys
+
+    def run(self):
+        try:
+            images = load_thumbnails(self.keys)
+        except Exception as e:
+            self.failed_signal.emit(self.keys, str(e))
+            return
+        self.done_signal.emit(self.generation, images)
@@ -0,0 +1,374 @@
+from collections import OrderedDict
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionViewItem
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSize, QThreadPool, QTimer, Signal, Slot
+from PySide6.QtGui import QPixmap, QColor
+from app.ui.history_loader import (
+    HistoryLoaderSignals, HistoryTask, ThumbnailTask, load_history_rows, load_history_record
+)
+from sqlite_database.src.image_store import THUMBNAIL_SIZE
+
+HISTORY_COLUMNS = ["#", "Date/Time", "Raw Image", "Detection Image", "Defects", "Barcode"]
+# Thumbnail columns and the image type they show
+IMAGE_COLUMNS = {2: "img_raw", 3: "img_detect"}
+# Rows loaded per fetchMore() call
+FETCH_SIZE = 100
+
+class ThumbnailCache:
+    """In-memory LRU of thumbnail QPixmaps keyed by (row_id, image_type)"""
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self._pixmaps = OrderedDict()
+
+    def get(self, row_id, image_type):
+        key = (row_id, image_type)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, row_id, image_type, pixmap):
+        self._pixmaps[(row_id, image_type)] = pixmap
+        self._pixmaps.move_to_end((row_id, image_type))
+        while len(self._pixmaps) > self.capacity:
+            self._pixmaps.popitem(last=False)
+
+    def invalidate(self, row_id):
+        for key in [key for key in self._pixmaps if key[0] == row_id]:
+            del self._pixmaps[key]
+
+    def clear(self):
+        self._pixmaps.clear()
+
+class DetectionHistoryModel(QAbstractTableModel):
+    """
+    Virtual table model of the detection history.
+
+    Rows are fetched on demand in chunks (canFetchMore/fetchMore) following the
+    keyset cursor of the last loaded row, on a background thread. Only row
+    metadata is kept; thumbnails are loaded when a cell is painted and kept in
+    a bounded LRU, so memory stays bounded while scrolling through the history.
+    """
+
+    total_changed = Signal(int)           # records matching the filters
+    rows_fetched = Signal(int)            # rows loaded so far
+    defect_types_loaded = Signal(object)  # defect names of the catalog
+    load_failed = Signal(str)
+
+    def __init__(self, parent=None, fetch_size=FETCH_SIZE):
+        super().__init__(parent)
+        self.fetch_size = fetch_size
+        self.total = 0
+        self._rows = []
+        self._filters = None
+        self._cursor = None
+        self._exhausted = True
+        self._fetching = False
+
+        # Every reset gets a generation number, results of older generations are dropped
+        self._generation = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.pool.setExpiryTimeout(-1)  # keep the thread (and its DB connection) alive
+        self.signals = HistoryLoaderSignals(self)
+        self.signals.rows_loaded.connect(self._on_rows_loaded)
+        self.signals.record_loaded.connect(self._on_record_loaded)
+        self.signals.thumbnails_loaded.connect(self._on_thumbnails_loaded)
+        self.signals.load_failed.connect(self._on_load_failed)
+        self.signals.thumbnails_failed.connect(self._on_thumbnails_failed)
+
+        # Thumbnails requested while painting are batched into one load per event loop pass
+        self.thumbnail_cache = ThumbnailCache()
+        self._pending_thumbnails = set()
+        self._requested_thumbnails = set()
+        self._missing_thumbnails = set()
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(0)
+        self._thumbnail_timer.timeout.connect(self._load_pending_thumbnails)
+
+    # === Qt model interface ===
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HISTORY_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HISTORY_COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        rowid, time_str, has_img_raw, has_img_detect, defect, barcode, _ = self._rows[index.row()]
+        col = index.column()
+
+        if role == Qt.UserRole:
+            return rowid  # Real database ID
+
+        if col == 0:
+            if role == Qt.DisplayRole:
+                return str(index.row() + 1)
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+
+        elif col == 1:
+            if role == Qt.DisplayRole:
+                time_parts = time_str.split(' ')
+                return time_parts[1][:8] if len(time_parts) >= 2 else time_str[-8:]
+            if role == Qt.ToolTipRole:
+                return time_str
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+
+        elif col in IMAGE_COLUMNS:
+            img_type = IMAGE_COLUMNS[col]
+            has_img = has_img_raw if col == 2 else has_img_detect
+            if role == Qt.DecorationRole:
+                return self.thumbnail(rowid, img_type) if has_img else None
+            if role == Qt.DisplayRole:
+                if not has_img or (rowid, img_type) in self._missing_thumbnails:
+                    return "No image"
+                return "Loading..."
+            if role == Qt.ToolTipRole and has_img:
+                return "Double-click to view full image"
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+
+        elif col == 4:
+            if role in (Qt.DisplayRole, Qt.ToolTipRole):
+                return defect if defect else "No defects"
+            if role == Qt.BackgroundRole:
+                return QColor(255, 235, 238) if self._is_failed(defect) else QColor(232, 245, 233)
+            if role == Qt.ForegroundRole:
+                return QColor(183, 28, 28) if self._is_failed(defect) else QColor(46, 125, 50)
+
+        elif col == 5:
+            if role == Qt.DisplayRole:
+                return barcode if barcode else "N/A"
+            if role == Qt.ToolTipRole:
+                return barcode if barcode else "No barcode"
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid() and self._filters is not None
+                and not self._exhausted and not self._fetching)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._fetch(with_count=False)
+
+    # === Loading ===
+    def set_filters(self, date_from, date_to, defect_filter):
+        """Reset the model to the newest records matching the filters"""
+        self._filters = (date_from, date_to, defect_filter)
+        self._generation += 1
+        # Drop queued loads of the previous filters (running ones are ignored when they finish)
+        self.pool.clear()
+        self._pending_thumbnails.clear()
+        self._requested_thumbnails.clear()
+        self._missing_thumbnails.clear()
+
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._exhausted = False
+        self._fetching = False
+        self.endResetModel()
+        self._fetch(with_count=True)
+
+    def refresh(self):
+        """Reload from the newest record with the current filters"""
+        if self._filters is not None:
+            self.set_filters(*self._filters)
+
+    def cancel_loading(self, timeout_ms=2000):
+        """Cancel pending loads and wait for the loader thread (call on shutdown)"""
+        self._generation += 1
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+
+    def _fetch(self, with_count):
+        self._fetching = True
+        generation = self._generation
+        date_from, date_to, defect_filter = self._filters
+        request = {
+            "date_from": date_from,
+            "date_to": date_to,
+            "defect_filter": defect_filter,
+            "limit": self.fetch_size,
+            "cursor": self._cursor,
+            "with_count": with_count,
+        }
+        is_cancelled = lambda: generation != self._generation
+        self.pool.start(HistoryTask(
+            generation, load_history_rows, (request, is_cancelled),
+            self.signals.rows_loaded, self.signals.load_failed, is_cancelled
+        ))
+
+    @Slot(int, object)
+    def _on_rows_loaded(self, generation, chunk):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if chunk["total"] is not None:
+            self.total = chunk["total"]
+            self.total_changed.emit(self.total)
+        if chunk["defect_types"] is not None:
+            self.defect_types_loaded.emit(chunk["defect_types"])
+
+        rows = chunk["rows"]
+        if len(rows) < self.fetch_size:
+            self._exhausted = True
+        if rows:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self._rows.extend(rows)
+            self._cursor = (rows[-1][6], rows[-1][0])
+            self.endInsertRows()
+        self.rows_fetched.emit(len(self._rows))
+
+    def add_record(self, row_id):
+        """Load a newly saved record in background and insert it if it matches the filters"""
+        if self._filters is None:
+            return
+        generation = self._generation
+        is_cancelled = lambda: generation != self._generation
+        self.pool.start(HistoryTask(
+            generation, load_history_record, (row_id, self._filters),
+            self.signals.record_loaded, self.signals.load_failed, is_cancelled
+        ))
+
+    @Slot(int, object)
+    def _on_record_loaded(self, generation, loaded):
+        if generation != self._generation:
+            return
+        self.defect_types_loaded.emit(loaded["defect_types"])
+        record = loaded["record"]
+        if record is None:
+            return
+
+        # Keep the newest-first (ts, id) order; the new record normally lands on top
+        key = (record[6], record[0])
+        row = 0
+        while row < len(self._rows) and (self._rows[row][6], self._rows[row][0]) > key:
+            row += 1
+        if row < len(self._rows) and self._rows[row][0] == record[0]:
+            return  # Already loaded by a fetch that ran after the record was saved
+        # The total was counted when the filters were applied: the new record adds to it either way
+        self.total += 1
+        self.total_changed.emit(self.total)
+        if row == len(self._rows) and not self._exhausted:
+            return  # Beyond the loaded rows: the next fetchMore() brings it
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, record)
+        self.endInsertRows()
+        self.rows_fetched.emit(len(self._rows))
+
+    @Slot(int, str)
+    def _on_load_failed(self, generation, message):
+        if generation == self._generation:
+            self._fetching = False
+            self.load_failed.emit(message)
+
+    # === Thumbnails ===
+    def thumbnail(self, row_id, image_type):
+        """Get a cached thumbnail, or schedule its background load and return None"""
+        pixmap = self.thumbnail_cache.get(row_id, image_type)
+        if pixmap is None:
+            key = (row_id, image_type)
+            if key not in self._requested_thumbnails and key not in self._missing_thumbnails:
+                self._requested_thumbnails.add(key)
+                self._pending_thumbnails.add(key)
+                self._thumbnail_timer.start()
+        return pixmap
+
+    def _load_pending_thumbnails(self):
+        keys = self._pending_thumbnails
+        self._pending_thumbnails = set()
+        if keys:
+            self.pool.start(ThumbnailTask(
+                self._generation, keys, self.signals.thumbnails_loaded, self.signals.thumbnails_failed
+            ))
+
+    @Slot(int, object)
+    def _on_thumbnails_loaded(self, generation, images):
+        # Thumbnails are keyed by row ID, so they stay valid across filter changes
+        for key, image in images.items():
+            self._requested_thumbnails.discard(key)
+            if image is None:
+                # Record without a readable image file: stop asking for it
+                self._missing_thumbnails.add(key)
+            else:
+                # QPixmap must be created on the GUI thread
+                self.thumbnail_cache.put(*key, QPixmap.fromImage(image))
+        if generation == self._generation and self._rows:
+            self.dataChanged.emit(
+                self.index(0, min(IMAGE_COLUMNS)), self.index(len(self._rows) - 1, max(IMAGE_COLUMNS)),
+                [Qt.DecorationRole, Qt.DisplayRole]
+            )
+
+    @Slot(object, str)
+    def _on_thumbnails_failed(self, keys, message):
+        # Not a row-load error: the row fetch state is left alone, only these cells stop
+        # showing "Loading..." (retried after the next reset)
+        print(f"Error loading thumbnails: {message}")
+        for key in keys:
+            self._requested_thumbnails.discard(key)
+            self._missing_thumbnails.add(key)
+        if self._rows:
+            self.dataChanged.emit(
+                self.index(0, min(IMAGE_COLUMNS)), self.index(len(self._rows) - 1, max(IMAGE_COLUMNS)),
+                [Qt.DecorationRole, Qt.DisplayRole]
+            )
+
+    # === Row access ===
+    def record(self, row):
+        """Get the metadata of a row: (rowid, time, has_img_raw, has_img_detect, defect, barcode, ts)"""
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def remove_record(self, row_id):
+        """Remove a deleted detection from the model without reloading"""
+        for row, record in enumerate(self._rows):
+            if record[0] == row_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                self.total = max(0, self.total - 1)
+                self.total_changed.emit(self.total)
+                break
+        self.thumbnail_cache.invalidate(row_id)
+
+    @staticmethod
+    def _is_failed(defect):
+        return bool(defect) and defect.lower() != "no defects"
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Paint thumbnails from the model's cache, centered in the cell"""
+
+    def paint(self, painter, option, index):
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is None:
+            # "Loading..." / "No image" text
+            super().paint(painter, option, index)
+            return
+
+        # Cell background and selection, without text
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        opt.features &= ~QStyleOptionViewItem.HasDecoration
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, opt.widget)
+
+        x = option.rect.x() + (option.rect.width() - pixmap.width()) // 2
+        y = option.rect.y() + (option.rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
+
+    def sizeHint(self, option, index):
+        return QSize(THUMBNAIL_SIZE[0] + 10, THUMBNAIL_SIZE[1] + 10)
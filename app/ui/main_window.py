@@ -2,20 +2,29 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, 
     QFrame, QListWidget, QListWidgetItem, QWidget, QSplitter, QSizePolicy,
     QStatusBar, QToolBar, QTabWidget, QGridLayout, QGroupBox, QMessageBox, QLineEdit,
-    QProgressBar, QScrollArea, QGraphicsDropShadowEffect
+    QProgressBar, QScrollArea, QGraphicsDropShadowEffect, QComboBox
 )
 from PySide6.QtCore import Qt, QSize, QTimer, Signal, Slot, QThread, QPropertyAnimation, QEasingCurve
 from PySide6.QtGui import QImage, QPixmap, QIcon, QFont, QColor, QPalette, QPainter, QLinearGradient
-from app.model.detector import detect_image
-import cv2
+from app.model.detector import list_models, get_active_model_name, set_active_model, load_model_async
+from app.model.renderer import get_renderer
 from datetime import datetime
-from app.camera.basler_camera import PylonCamera
+from app.camera.base import create_camera, CAMERA_TEST_IMAGE
+from app.inspection.trigger import InspectionTrigger, TRIGGER_MODE, HARDWARE_TRIGGER_LINE
 from app.ui.detection_history_tab import DetectionHistoryTab
-from sqlite_database.src.db_operations import update_detection_in_db, create_database, create_connection, get_scanned_barcode
+from app.ui.diagnostics_tab import DiagnosticsTab
+from app.inspection.metrics import timed, get_latency_metrics
+from sqlite_database.src.db_operations import create_connection, get_scanned_barcode, close_all_connections
 # Import barcode detector
 from app.barcode.detector import read_from_scanner_pynput
 import threading
 from app.ui.styles import AppStyles
+from sqlite_database.src.persistence_worker import get_persistence_worker, stop_persistence_worker
+from sqlite_database.src.codec_executor import stop_codec_executor
+
+# Result view: rescale once the window stops resizing, keep the last few scaled sizes
+RESIZE_DEBOUNCE_MS = 60
+SCALED_CACHE_SIZE = 4
 
 class BarcodeThread(QThread):
     """Thread for running barcode scanner in background"""
@@ -34,32 +43,6 @@ class BarcodeThread(QThread):
         except Exception as e:
             print(f"Barcode scanner error: {e}")
 
-class ImageThread(QThread):
-    """Thread for loading and processing images"""
-    image_loaded = Signal(object, object)
-    progress_updated = Signal(int)
-    
-    def __init__(self, row_id):
-        super().__init__()
-        self.row_id = row_id 
-        
-    def run(self):
-        # Emit progress updates
-        self.progress_updated.emit(25)
-        
-        # Process image in background thread
-        results = detect_image(self.row_id)  
-        
-        self.progress_updated.emit(75)
-        
-        if results:
-            result_obj = results[0]
-            img_with_boxes = result_obj.plot()
-            # Emit the processed image and results
-            self.image_loaded.emit(img_with_boxes, result_obj)
-            
-        self.progress_updated.emit(100)
-
 class AnimatedButton(QPushButton):
     """Custom button with hover animations"""
     def __init__(self, text, parent=None):
@@ -145,14 +128,24 @@ class DefectDetectionApp(QMainWindow):
     def __init__(self):
         super().__init__()
         
-        self.history_needs_refresh = False
-        self.history_loaded = False 
-        self.processing_timer = QTimer()
+        # Result view: full-resolution pixmap of the last result and its scaled versions per label size
+        self.display_pixmap = None
+        self.scaled_pixmaps = {}
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.resize_timer.timeout.connect(self.update_display_pixmap)
         
-        # Initialize database
-        create_database()
+        # Database schema is created by main() before the model loads, just open this thread's connection
         create_connection()
         
+        # Camera stays open for the whole session (CAMERA_BACKEND=pylon|replay),
+        # streaming starts in init_inspection() once the trigger mode is configured
+        self.camera = create_camera()
+        
+        # Trigger-driven inspection: parts are queued and processed capture → infer → persist
+        self.init_inspection()
+        
         # Initialize and start barcode scanner thread
         self.init_barcode_scanner()
         
@@ -189,10 +182,12 @@ class DefectDetectionApp(QMainWindow):
         # Create tabs
         self.live_detection_tab = QWidget()
         self.history_tab = DetectionHistoryTab()
+        self.diagnostics_tab = DiagnosticsTab(self.inspection.get_stage_stats)
         
         # Add tabs
         self.tab_widget.addTab(self.live_detection_tab, "🎯 Live Detection")
         self.tab_widget.addTab(self.history_tab, "📊 Detection History")
+        self.tab_widget.addTab(self.diagnostics_tab, "🩺 Diagnostics")
         
         # Setup tabs
         self.setup_live_detection_tab()
@@ -234,6 +229,44 @@ class DefectDetectionApp(QMainWindow):
         version_label.setStyleSheet("color: #6c757d; font-size: 12px; padding: 4px 8px;")
         self.statusBar.addPermanentWidget(version_label)
 
+    def init_inspection(self):
+        """Create the inspection pipeline and connect the configured trigger source"""
+        self.inspection = InspectionTrigger(self.capture_frame, parent=self)
+        self.inspection.part_queued.connect(self.on_part_queued)
+        self.inspection.part_inspected.connect(self.on_part_inspected)
+        self.inspection.part_saved.connect(self.on_part_saved)
+        self.inspection.part_failed.connect(self.on_part_failed)
+        self.inspection.progress_updated.connect(self.update_progress)
+        self.inspection.start()
+        
+        if TRIGGER_MODE == "hardware":
+            # One frame per pulse on the part sensor line, every frame is a part
+            if self.camera.enable_hardware_trigger(HARDWARE_TRIGGER_LINE) and self.camera.start_streaming():
+                self.camera.frame_listeners.append(self.inspection.on_hardware_frame)
+        elif CAMERA_TEST_IMAGE:
+            print(f"🧪 Test mode: every trigger inspects {CAMERA_TEST_IMAGE} (CAMERA_TEST_IMAGE)")
+        else:
+            # Grab liên tục vào ring buffer: mỗi trigger lấy frame tại thời điểm trigger
+            self.camera.start_streaming()
+        print(f"🎯 Inspection trigger mode: {TRIGGER_MODE}")
+    
+    def capture_frame(self, trigger_time):
+        """
+        Get the frame of a triggered part (called from the inspection capture thread).
+        
+        Args:
+            trigger_time (float): time.monotonic() of the trigger.
+        
+        Returns:
+            numpy.ndarray: The BGR frame, or None if failed.
+        """
+        if CAMERA_TEST_IMAGE:
+            return self.camera.grab_frame_from_file(CAMERA_TEST_IMAGE)
+        if self.camera.is_streaming():
+            return self.camera.frame_at(trigger_time)
+        # Streaming could not start (e.g. camera unplugged at startup): grab a single frame
+        return self.camera.capture_image()
+
     def init_barcode_scanner(self):
         """Initialize barcode scanner in background thread"""
         self.barcode_thread = BarcodeThread()
@@ -251,6 +284,10 @@ class DefectDetectionApp(QMainWindow):
         # You can add visual feedback here
         self.show_barcode_notification(barcode)
         
+        # Barcode-triggered station: each scanned part is inspected
+        if TRIGGER_MODE == "barcode":
+            self.inspection.trigger("barcode", barcode)
+        
     def show_barcode_notification(self, barcode):
         """Show visual notification when barcode is scanned"""
         # Create a temporary status message
@@ -395,9 +432,21 @@ class DefectDetectionApp(QMainWindow):
         self.btnClear.setStyleSheet(AppStyles.get_clear_button_style())
         self.btnClear.clicked.connect(self.clear_results)
         
+        # Model selector - switch model at runtime without restarting
+        model_label = QLabel("🧠 Model:")
+        self.model_combo = QComboBox()
+        self.model_combo.setMinimumHeight(40)
+        self.model_combo.addItems(list(list_models().keys()))
+        active_model = get_active_model_name()
+        if active_model:
+            self.model_combo.setCurrentText(active_model)
+        self.model_combo.currentTextChanged.connect(self.on_model_changed)
+        
         controls_layout.addWidget(self.btnCapture)
         controls_layout.addWidget(self.btnClear)
         controls_layout.addStretch()
+        controls_layout.addWidget(model_label)
+        controls_layout.addWidget(self.model_combo)
         
         main_layout.addWidget(controls_frame)
         
@@ -407,51 +456,67 @@ class DefectDetectionApp(QMainWindow):
         # tab_layout.setContentsMargins(0, 0, 0, 0)
         # tab_layout.addWidget(scroll)
 
+    @Slot(str)
+    def on_model_changed(self, model_name):
+        """Switch the active detection model and load it in background"""
+        if not model_name:
+            return
+        try:
+            set_active_model(model_name)
+            # Load and warm up the new model off the GUI thread
+            load_model_async(model_name)
+            self.status_message.setText(f"🧠 Loading model {model_name}...")
+        except Exception as e:
+            self.show_error(f"Error switching model: {str(e)}")
+
     def update_status_bar(self):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Queue depth in front of every pipeline stage, persistence included
+        stages = self.inspection.get_stage_stats()
+        queue_info = "⚙️ " + " › ".join(f"{stage['name']} {stage['queue_depth']}" for stage in stages)
+        metrics = get_persistence_worker().get_metrics()
+        queue_info += f" | 💾 waits {metrics['backpressure_waits']}"
+        # Where the cycle time goes: p95 of the slowest stages (details in the Diagnostics tab)
+        latency = {row["stage"]: row for row in get_latency_metrics().summary()}
+        timings = [f"{stage} {latency[stage]['p95']:.0f}" for stage in ("inference", "image_encode", "db_insert") if stage in latency]
+        if timings:
+            queue_info += " | ⏱️ p95 ms: " + ", ".join(timings)
         # Check if there's a scanned barcode
         current_barcode = get_scanned_barcode()
         if current_barcode:
-            self.status_message.setText(f"🟢 Ready | {current_time} | 📦 Barcode: {current_barcode}")
+            self.status_message.setText(f"🟢 Ready | {current_time} | 📦 Barcode: {current_barcode} | {queue_info}")
         else:
-            self.status_message.setText(f"🟢 Ready | {current_time} | 🔍 Scanner active")
+            self.status_message.setText(f"🟢 Ready | {current_time} | 🔍 Scanner active | {queue_info}")
 
     def on_capture(self):
-        """Enhanced capture with progress indication"""
-        try:
-            self.status_message.setText("📸 Capturing image...")
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.set_processing_state(True)
-            
-            camera = PylonCamera() 
-            
-            # ========================
-            # CHUYỂN ĐỔI TEST MODE
-            # ========================
-            
-            # Uncomment một trong những dòng dưới để test:
-            
-            # 1. Test với file cụ thể:
-            row_id = camera.capture_image_from_file()
-            
-            # 2. Test với file có tên cụ thể trong storage:
-            # row_id = camera.capture_test_image("defect_sample.jpg")
-            
-            # 3. Dùng camera thật (dòng gốc):
-            # row_id = camera.capture_image()
-            
-            if row_id is None:
-                raise Exception("Failed to capture image.")    
-                
-            # Process image in background thread
-            self.image_thread = ImageThread(row_id)
-            self.image_thread.image_loaded.connect(self.on_image_processed)
-            self.image_thread.progress_updated.connect(self.update_progress)
-            self.image_thread.start()
-            
-        except Exception as e:
-            self.show_error(f"Error capturing image: {str(e)}")
+        """Software trigger: queue one part for inspection"""
+        self.status_message.setText("📸 Capturing image...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.inspection.trigger("software")
+    
+    @Slot(object)
+    def on_part_queued(self, part):
+        self.set_processing_state(True)
+    
+    @Slot(object, object, object)
+    def on_part_inspected(self, part, img_with_boxes, result_obj):
+        with timed("ui_render"):
+            self.on_image_processed(img_with_boxes, result_obj)
+        # The pixmap holds its own copy now: the annotated buffer can be reused
+        get_renderer().release(img_with_boxes)
+    
+    @Slot(object, int)
+    def on_part_saved(self, part, row_id):
+        self.on_record_saved(row_id)
+        if self.inspection.in_flight() == 0:
+            self.set_processing_state(False)
+    
+    @Slot(object, str)
+    def on_part_failed(self, part, message):
+        self.show_error(message)
+        # Other parts may still be in flight (e.g. a trigger rejected while the station is busy)
+        if self.inspection.in_flight() == 0:
             self.set_processing_state(False)
             self.progress_bar.setVisible(False)
 
@@ -466,28 +531,13 @@ class DefectDetectionApp(QMainWindow):
     def on_image_processed(self, img_with_boxes, result_obj):
         """Handle processed image with enhanced UI updates"""
         try:
-            # Save to database
-            update_detection_in_db(self.image_thread.row_id, img_with_boxes, result_obj)
-
-            # TỰ ĐỘNG REFRESH HISTORY TAB NGAY SAU KHI CHỤP XONG
-            if hasattr(self, 'history_tab') and self.history_tab:
-                self.history_tab.refresh_data()
-                print("🔄 History tab auto-refreshed after image processing")
-            
-            # Mark history as needing refresh (backup)
-            self.history_loaded = False
-            self.history_needs_refresh = True
-            
-            # Display image with enhanced styling
-            pixmap = cv2.cvtColor(img_with_boxes, cv2.COLOR_BGR2RGB)
-            height, width, channel = pixmap.shape
-            bytes_per_line = 3 * width
-            qimg = QImage(pixmap.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            
-            # Scale to fit with smooth transformation
-            scaled_pixmap = QPixmap.fromImage(qimg).scaled(
-                self.lblImage.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.lblImage.setPixmap(scaled_pixmap)
+            # Display image: QImage đọc thẳng buffer BGR (không copy chuyển màu), QPixmap.fromImage
+            # copies it; the pixmap keeps full resolution so resizes rescale from the original
+            height, width = img_with_boxes.shape[:2]
+            qimg = QImage(img_with_boxes.data, width, height, img_with_boxes.strides[0], QImage.Format_BGR888)
+            self.display_pixmap = QPixmap.fromImage(qimg)
+            self.scaled_pixmaps.clear()
+            self.update_display_pixmap()
             
             # Update image info with enhanced formatting
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -559,15 +609,42 @@ class DefectDetectionApp(QMainWindow):
                 self.result_indicator.setText("✅ QUALITY PASSED\nNo defects detected")
                 self.result_indicator.setStyleSheet(AppStyles.get_result_indicator_styles()['passed'])
             
-            self.set_processing_state(False)
+            # This part is only saved later and others may be queued: on_part_saved ends the busy state
+            if self.inspection.in_flight() == 0:
+                self.set_processing_state(False)
             self.status_message.setText("🟢 Analysis complete")
             
         except Exception as e:
             self.show_error(f"Error processing results: {str(e)}")
-            self.set_processing_state(False)
+            if self.inspection.in_flight() == 0:
+                self.set_processing_state(False)
+
+    @Slot(int)
+    def on_record_saved(self, row_id):
+        """Add the inspection to the history once it has been persisted in background"""
+        # CẬP NHẬT HISTORY TAB NGAY SAU KHI LƯU XONG (chỉ thêm record mới)
+        if hasattr(self, 'history_tab') and self.history_tab:
+            self.history_tab.add_new_record(row_id)
+
+    def update_display_pixmap(self):
+        """Show the last result scaled to the image label (each size is scaled once)"""
+        if self.display_pixmap is None:
+            return
+        size = self.lblImage.size()
+        key = (size.width(), size.height())
+        scaled_pixmap = self.scaled_pixmaps.get(key)
+        if scaled_pixmap is None:
+            if len(self.scaled_pixmaps) >= SCALED_CACHE_SIZE:
+                self.scaled_pixmaps.clear()
+            # Scale to fit with smooth transformation
+            scaled_pixmap = self.scaled_pixmaps[key] = self.display_pixmap.scaled(
+                size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.lblImage.setPixmap(scaled_pixmap)
 
     def clear_results(self):
         """Enhanced clear function with animations"""
+        self.display_pixmap = None
+        self.scaled_pixmaps.clear()
         self.lblImage.clear()
         self.lblImage.setText("🎯 Captured image will appear here\n\nClick 'Capture Image' to start quality inspection")
         self.lstResult.clear()
@@ -588,8 +665,8 @@ class DefectDetectionApp(QMainWindow):
 
     def set_processing_state(self, is_processing):
         """Enhanced processing state with visual feedback"""
-        self.btnCapture.setEnabled(not is_processing)
-        self.btnClear.setEnabled(not is_processing)
+        # Capture stays enabled: further parts queue behind the ones in flight
+        self.btnClear.setEnabled(not is_processing and self.inspection.in_flight() == 0)
         
         if is_processing:
             self.setCursor(Qt.WaitCursor)
@@ -620,22 +697,17 @@ class DefectDetectionApp(QMainWindow):
         self.result_indicator.setStyleSheet(AppStyles.get_result_indicator_styles()['error'])
 
     def show_history_tab(self):
-        """Switch to history tab and refresh data"""
+        """Switch to history tab (it catches up on new records when shown)"""
         self.tab_widget.setCurrentWidget(self.history_tab)
-        self.history_tab.refresh_data()
 
     def resizeEvent(self, event):
         """Handle window resize"""
         super().resizeEvent(event)
     
         # Kiểm tra xem lblImage đã được khởi tạo chưa
-        if hasattr(self, 'lblImage'):
-            # Resize pixmap if available
-            pixmap = self.lblImage.pixmap()
-            if pixmap and not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(
-                    self.lblImage.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.lblImage.setPixmap(scaled_pixmap)
+        if hasattr(self, 'lblImage') and self.display_pixmap is not None:
+            # Rescale from the original once resizing settles, not on every resize event
+            self.resize_timer.start()
 
     def closeEvent(self, event):
         try:
@@ -653,11 +725,23 @@ class DefectDetectionApp(QMainWindow):
                         print("Force killing thread")        
                 print("Barcode scanner stopped")
             
-            # Stop other threads
-            if hasattr(self, 'image_thread') and self.image_thread.isRunning():
-                self.image_thread.requestInterruption()
-                if not self.image_thread.wait(1000):
-                    self.image_thread.terminate()
+            # Stop the inspection pipeline (parts already captured are still inspected)
+            if hasattr(self, 'inspection'):
+                self.inspection.stop()
+            
+            # Release the camera
+            if hasattr(self, 'camera'):
+                self.camera.close()
+            
+            # Stop background history loading
+            if hasattr(self, 'history_tab') and self.history_tab:
+                self.history_tab.cancel_loading()
+            
+            # Write every queued detection to disk before exiting
+            print("💾 Flushing pending detections...")
+            stop_persistence_worker(timeout=10)
+            stop_codec_executor()
+            close_all_connections()
                     
         except Exception as e:
             print(f"Error during cleanup: {e}")
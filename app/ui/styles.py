@@ -1116,7 +1116,7 @@ class HistoryTabStyles:
     def get_expanded_table_style():
         """Table style with more vertical space"""
         return """
-            QTableWidget {
+            QTableView {
                 border: 2px solid #bdc3c7;
                 border-radius: 12px;
                 background-color: white;
@@ -1140,19 +1140,19 @@ class HistoryTabStyles:
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
                     stop:0 #3d566e, stop:1 #34495e);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px 6px;
                 border-bottom: 1px solid #ecf0f1;
                 border-right: 1px solid #f8f9fa;
                 word-wrap: break-word;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
                     stop:0 #e8f4fd, stop:1 #d4edda);
                 color: #2c3e50;
                 border: 1px solid #4a86e8;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #f8f9fa;
                 border: 1px solid #dee2e6;
             }
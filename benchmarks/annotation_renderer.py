@@ -0,0 +1,79 @@
+"""
+Compare the OpenCV annotation renderer with ultralytics' Results.plot().
+
+Runs the model once per image, then times both renderers on the same results.
+
+Usage:
+    python -m benchmarks.annotation_renderer [--source DIR] [--limit N] [--repeat N] [--save-dir DIR]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import cv2
+from app.model.detector import detect_frame
+from app.model.renderer import AnnotationRenderer
+from benchmarks.station_throughput import percentile
+
+def time_ms(func, repeat):
+    """Run func repeat times and return the durations (ms) and the last output."""
+    durations = []
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations, output
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the annotation renderer against Results.plot()")
+    parser.add_argument("--source", default="storage/captured_images", help="Folder of images")
+    parser.add_argument("--limit", type=int, default=16, help="Number of images")
+    parser.add_argument("--repeat", type=int, default=20, help="Renders per image and renderer")
+    parser.add_argument("--save-dir", default=None, help="Write both renderings of each image here for a visual check")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.source, "*.png")))[:args.limit]
+    if not files:
+        print(f"[!] No images in {args.source}")
+        return 1
+
+    renderer = AnnotationRenderer()
+    plot_ms, render_ms = [], []
+    for path in files:
+        frame = cv2.imread(path)
+        results = detect_frame(frame)
+        if not results:
+            print("[!] No model could be loaded")
+            return 1
+        result_obj = results[0]
+
+        durations, plotted = time_ms(result_obj.plot, args.repeat)
+        plot_ms.extend(durations)
+
+        def render():
+            annotated = renderer.render_result(result_obj, frame)
+            # Same life cycle as in the pipeline: the buffer goes back to the pool
+            renderer.release(annotated)
+            return annotated
+        durations, rendered = time_ms(render, args.repeat)
+        render_ms.extend(durations)
+
+        if args.save_dir:
+            os.makedirs(args.save_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0]
+            cv2.imwrite(os.path.join(args.save_dir, f"{name}_plot.png"), plotted)
+            cv2.imwrite(os.path.join(args.save_dir, f"{name}_renderer.png"), rendered)
+
+    print(f"\n=== Annotation ({len(files)} images x {args.repeat} renders) ===")
+    print(f"{'Renderer':<22}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+    for name, durations in (("Results.plot()", plot_ms), ("AnnotationRenderer", render_ms)):
+        print(f"{name:<22}{sum(durations) / len(durations):>9.2f}{percentile(durations, 50):>9.2f}"
+              f"{percentile(durations, 95):>9.2f}{max(durations):>9.2f}")
+    print(f"Speed-up (p50): {percentile(plot_ms, 50) / percentile(render_ms, 50):.1f}x, "
+          f"buffers allocated: {renderer.buffers_allocated}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
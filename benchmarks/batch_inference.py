@@ -0,0 +1,66 @@
+"""
+Re-inspect stored parts with detect_batch() and compare batch sizes.
+
+Runs every image (files of a folder, or records of the database by row ID)
+through the active model once per batch size and reports throughput and the
+defects found, so the batch size of an offline re-inspection can be chosen.
+
+Usage:
+    python -m benchmarks.batch_inference [--source DIR | --from-db] [--limit N] [--batch-sizes 1,4,8]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import cv2
+from app.model.detector import detect_batch, get_model, warmup_model
+from sqlite_database.src.db_operations import execute_query, extract_detections
+
+def load_items(args):
+    """Row IDs of the newest records (--from-db) or the frames of the source folder."""
+    if args.from_db:
+        rows = execute_query(
+            "SELECT rowid FROM detections WHERE img_raw_hash IS NOT NULL OR img_raw IS NOT NULL "
+            "ORDER BY rowid DESC LIMIT ?", (args.limit,), fetch=True
+        ) or []
+        return [row[0] for row in rows]
+    files = sorted(glob.glob(os.path.join(args.source, "*.png")))[:args.limit]
+    return [cv2.imread(path) for path in files]
+
+def count_defects(results):
+    return sum(
+        1
+        for result_obj in results if result_obj is not None
+        for detection in extract_detections(result_obj) if str(detection[1]).lower() != "ok"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched re-inspection")
+    parser.add_argument("--source", default="storage/captured_images", help="Folder of images")
+    parser.add_argument("--from-db", action="store_true", help="Re-inspect the newest database records instead")
+    parser.add_argument("--limit", type=int, default=32, help="Number of images or records")
+    parser.add_argument("--batch-sizes", default="1,4,8", help="Comma-separated batch sizes to compare")
+    args = parser.parse_args()
+
+    items = load_items(args)
+    if not items:
+        print(f"[!] Nothing to inspect in {'the database' if args.from_db else args.source}")
+        return 1
+    if get_model() is None or not warmup_model():
+        print("[!] No model could be loaded")
+        return 1
+
+    print(f"\n=== Batched inference ({len(items)} {'records' if args.from_db else 'images'}) ===")
+    print(f"{'batch':>6}{'total s':>9}{'ms/img':>9}{'img/s':>8}{'failed':>8}{'defects':>9}")
+    for batch_size in (int(value) for value in args.batch_sizes.split(",")):
+        start = time.perf_counter()
+        results = detect_batch(items, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for result_obj in results if result_obj is None)
+        print(f"{batch_size:>6}{elapsed:>9.2f}{elapsed * 1000 / len(items):>9.1f}{len(items) / elapsed:>8.1f}"
+              f"{failed:>8}{count_defects(results):>9}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
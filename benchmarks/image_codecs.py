@@ -0,0 +1,63 @@
+"""
+Compare the image codec presets on captured frames.
+
+Encodes and decodes every image with each preset available here and reports
+timings, stored size and whether the round trip is pixel exact.
+
+Usage:
+    python -m benchmarks.image_codecs [--source DIR] [--limit N] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from sqlite_database.src.image_codec import available_presets, encode_image, decode_image, IMAGE_PRESETS
+from benchmarks.station_throughput import percentile
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image codec presets")
+    parser.add_argument("--source", default="storage/captured_images", help="Folder of images")
+    parser.add_argument("--limit", type=int, default=16, help="Number of images")
+    parser.add_argument("--repeat", type=int, default=5, help="Encode/decode rounds per image and preset")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.source, "*.png")))[:args.limit]
+    if not files:
+        print(f"[!] No images in {args.source}")
+        return 1
+    frames = [cv2.imread(path) for path in files]
+    raw_bytes = sum(frame.nbytes for frame in frames)
+
+    print(f"\n=== Image codecs ({len(frames)} images x {args.repeat} rounds, "
+          f"{raw_bytes / len(frames) / 1024:.0f} KiB raw per image) ===")
+    print(f"{'Preset':<16}{'enc p50':>9}{'enc p95':>9}{'dec p50':>9}{'dec p95':>9}"
+          f"{'KiB/img':>9}{'ratio':>8}  lossless")
+    for preset in available_presets():
+        encode_ms, decode_ms = [], []
+        encoded_bytes = 0
+        lossless = True
+        for frame in frames:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                data = encode_image(frame, preset)
+                encode_ms.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                decoded = decode_image(data)
+                decode_ms.append((time.perf_counter() - start) * 1000)
+            encoded_bytes += len(data)
+            lossless = lossless and decoded is not None and np.array_equal(decoded, frame)
+
+        print(f"{preset:<16}{percentile(encode_ms, 50):>9.2f}{percentile(encode_ms, 95):>9.2f}"
+              f"{percentile(decode_ms, 50):>9.2f}{percentile(decode_ms, 95):>9.2f}"
+              f"{encoded_bytes / len(frames) / 1024:>9.0f}{raw_bytes / encoded_bytes:>8.1f}  "
+              f"{'yes' if lossless else 'no'}")
+    print(f"Configured: img_raw={IMAGE_PRESETS['img_raw']}, img_detect={IMAGE_PRESETS['img_detect']} "
+          f"(IMAGE_CODEC_RAW / IMAGE_CODEC_DETECT)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
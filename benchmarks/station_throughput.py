@@ -0,0 +1,195 @@
+"""
+End-to-end station throughput with the replay camera (no camera or GPU needed).
+
+Every replayed frame is one part, exactly like the hardware trigger mode on
+the line: capture from the ring buffer -> inference -> write-behind persistence.
+Records go to a temporary database and image store unless --output-dir is given.
+
+Usage:
+    python -m benchmarks.station_throughput [--source DIR|IMAGE|VIDEO] [--fps N] [--jitter-ms MS]
+        [--duration S] [--model NAME] [--max-in-flight N] [--output-dir DIR] [--metrics-out FILE.csv|.json]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from PySide6.QtCore import QCoreApplication, QTimer
+from app.camera.base import create_camera, CAMERA_REPLAY_SOURCE
+from app.inspection.metrics import get_latency_metrics
+from app.inspection.trigger import InspectionTrigger, MAX_PARTS_IN_FLIGHT
+from app.model.detector import list_models, set_active_model, prepare_model
+from app.model.renderer import get_renderer
+from sqlite_database.src import db_operations, image_store
+from sqlite_database.src.persistence_worker import stop_persistence_worker, get_persistence_worker
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (None if empty)."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def _format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+def run_benchmark(camera, duration, max_in_flight=MAX_PARTS_IN_FLIGHT, drain_timeout=30.0):
+    """
+    Run the inspection pipeline on a replay camera for a fixed time.
+
+    Args:
+        camera (ReplayCamera): The (not yet streaming) replay camera.
+        duration (float): Seconds of replay.
+        max_in_flight (int): Parts allowed between trigger and persistence.
+        drain_timeout (float): Seconds allowed to finish the parts in flight after the replay.
+
+    Returns:
+        dict: Counters, throughput and latency percentiles.
+    """
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    inspection = InspectionTrigger(camera.frame_at, max_in_flight=max_in_flight)
+
+    lock = threading.Lock()
+    inspect_latencies = []
+    save_latencies = []
+    failures = {}
+
+    def on_inspected(part, img_with_boxes, result_obj):
+        with lock:
+            inspect_latencies.append(time.monotonic() - part.trigger_time)
+        get_renderer().release(img_with_boxes)
+
+    def on_saved(part, row_id):
+        with lock:
+            save_latencies.append(time.monotonic() - part.trigger_time)
+
+    def on_failed(part, error):
+        with lock:
+            failures[error] = failures.get(error, 0) + 1
+
+    inspection.part_inspected.connect(on_inspected)
+    inspection.part_saved.connect(on_saved)
+    inspection.part_failed.connect(on_failed)
+    inspection.start()
+
+    camera.enable_hardware_trigger()
+    camera.frame_listeners.append(inspection.on_hardware_frame)
+    if not camera.start_streaming():
+        inspection.stop()
+        raise RuntimeError("Replay camera could not start")
+
+    started = time.monotonic()
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec()
+
+    # Stop triggering, then let the parts already in flight finish
+    camera.stop_streaming()
+    replay_time = time.monotonic() - started
+    deadline = time.monotonic() + drain_timeout
+    while inspection.in_flight() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    get_persistence_worker().flush(max(0.0, deadline - time.monotonic()))
+    inspection.stop()
+    total_time = time.monotonic() - started
+
+    camera_stats = camera.get_stats()
+    with lock:
+        saved = len(save_latencies)
+        return {
+            "replay_s": replay_time,
+            "total_s": total_time,
+            "frames": camera_stats["frames_replayed"],
+            "camera_fps": camera_stats["fps"],
+            "frames_dropped": camera_stats["frames_dropped"],
+            "stats": dict(inspection.stats),
+            "throughput": saved / total_time if total_time > 0 else 0.0,
+            "inspect_p50": percentile(inspect_latencies, 50),
+            "inspect_p95": percentile(inspect_latencies, 95),
+            "save_p50": percentile(save_latencies, 50),
+            "save_p95": percentile(save_latencies, 95),
+            "save_max": max(save_latencies) if save_latencies else None,
+            "failures": dict(failures),
+            "persistence": get_persistence_worker().get_metrics(),
+            "stages": inspection.get_stage_stats(),
+        }
+
+def print_report(report):
+    stats = report["stats"]
+    print("\n=== Station throughput ===")
+    print(f"Replay:       {report['frames']} frames in {report['replay_s']:.1f} s "
+          f"({report['camera_fps']:.1f} fps measured, {report['frames_dropped']} dropped in ring buffer)")
+    print(f"Parts:        {stats['triggered']} triggered, {stats['rejected']} rejected (station busy), "
+          f"{stats['inspected']} inspected, {stats['saved']} saved, {stats['failed']} failed")
+    print(f"Throughput:   {report['throughput']:.2f} parts/s saved ({report['total_s']:.1f} s incl. drain)")
+    print(f"Verdict:      p50 {_format_ms(report['inspect_p50'])}, p95 {_format_ms(report['inspect_p95'])} (trigger -> result)")
+    print(f"Persisted:    p50 {_format_ms(report['save_p50'])}, p95 {_format_ms(report['save_p95'])}, "
+          f"max {_format_ms(report['save_max'])} (trigger -> committed)")
+    persistence = report["persistence"]
+    print(f"Persistence:  {persistence['batches']} batches, max queue depth {persistence['max_queue_depth']}, "
+          f"{persistence['backpressure_waits']} backpressure waits")
+    print(f"\n{'Stage':<12}{'workers':>8}{'done':>7}{'avg ms':>9}{'max ms':>9}{'max queue':>11}{'blocked ms':>12}")
+    for stage in report["stages"]:
+        print(f"{stage['name']:<12}{stage['workers']:>8}{stage['processed']:>7}{stage['avg_ms']:>9.1f}"
+              f"{stage['max_ms']:>9.1f}{stage['max_queue_depth']:>11}{stage['blocked_ms']:>12.0f}")
+    print(f"\n{'Latency':<12}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for row in get_latency_metrics().summary():
+        print(f"{row['stage']:<12}{row['count']:>7}{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}{row['max']:>9.1f}")
+    for error, count in report["failures"].items():
+        print(f"[!] {count}x {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end station throughput with the replay camera")
+    parser.add_argument("--source", default=CAMERA_REPLAY_SOURCE, help="Folder of images, an image or a video")
+    parser.add_argument("--fps", type=float, default=10.0, help="Replay frame rate (= parts per second offered)")
+    parser.add_argument("--jitter-ms", type=float, default=3.0, help="Standard deviation of the frame interval")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of replay")
+    parser.add_argument("--model", default=None, help=f"Model to use ({', '.join(list_models()) or 'none found'})")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_PARTS_IN_FLIGHT, help="Parts allowed in flight")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the replay jitter")
+    parser.add_argument("--metrics-out", default=None, help="Dump the stage latencies to a .csv or .json file")
+    parser.add_argument("--output-dir", default=None,
+                        help="Keep the database and images here (default: temporary, deleted afterwards)")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="station_benchmark_")
+    os.makedirs(output_dir, exist_ok=True)
+    # Never write benchmark parts into the production database
+    db_operations.DB_PATH = os.path.join(output_dir, "detections.db")
+    image_store.IMAGE_DIRS = {
+        image_type: os.path.join(output_dir, os.path.basename(path))
+        for image_type, path in image_store.IMAGE_DIRS.items()
+    }
+
+    try:
+        db_operations.create_database()
+        if args.model:
+            if args.model not in list_models():
+                print(f"[!] Unknown model: {args.model}")
+                return 1
+            set_active_model(args.model)
+        # Load and warm up before the clock starts, like the splash screen does
+        if not prepare_model():
+            print("[!] No model could be loaded")
+            return 1
+        get_latency_metrics().reset()
+
+        camera = create_camera("replay", source=args.source, fps=args.fps, jitter_ms=args.jitter_ms, seed=args.seed)
+        try:
+            report = run_benchmark(camera, args.duration, args.max_in_flight)
+        finally:
+            camera.close()
+        print_report(report)
+        if args.metrics_out:
+            print(f"Latency metrics written to {get_latency_metrics().dump(args.metrics_out)}")
+    finally:
+        stop_persistence_worker(10.0)
+        db_operations.close_all_connections()
+        if args.output_dir is None:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Compare whole-frame inference with ROI / tiled inference.
+
+Runs every image through the model once per mode and reports latency and
+the number of defects found, so the small-defect gain can be weighed
+against the extra forward passes.
+
+Usage:
+    python -m benchmarks.tiled_inference [--source DIR] [--limit N] [--roi X,Y,W,H]
+                                         [--tile-size N] [--overlap F] [--save-dir DIR]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import cv2
+from app.model.detector import prepare_inputs, detect_prepared, get_model, warmup_model
+from app.model.renderer import AnnotationRenderer
+from sqlite_database.src.db_operations import extract_detections
+from benchmarks.station_throughput import percentile
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark whole-frame against tiled inference")
+    parser.add_argument("--source", default="storage/captured_images", help="Folder of images")
+    parser.add_argument("--limit", type=int, default=16, help="Number of images")
+    parser.add_argument("--roi", default="", help="Region of interest x,y,w,h (default: whole frame)")
+    parser.add_argument("--tile-size", type=int, default=640, help="Tile side in frame pixels")
+    parser.add_argument("--overlap", type=float, default=0.2, help="Overlap between neighbouring tiles")
+    parser.add_argument("--save-dir", default=None, help="Write the annotated output of each mode here")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.source, "*.png")))[:args.limit]
+    if not files:
+        print(f"[!] No images in {args.source}")
+        return 1
+    if get_model() is None or not warmup_model():
+        print("[!] No model could be loaded")
+        return 1
+
+    modes = {
+        "whole frame": dict(roi=args.roi, tiled=False),
+        "tiled": dict(roi=args.roi, tiled=True, tile_size=args.tile_size, overlap=args.overlap),
+    }
+    renderer = AnnotationRenderer()
+    rows = []
+    for mode, options in modes.items():
+        durations, defects, tiles = [], 0, 0
+        for path in files:
+            frame = cv2.imread(path)
+            start = time.perf_counter()
+            inputs = prepare_inputs(frame, **options)
+            result_obj = detect_prepared(inputs, frame)[0]
+            durations.append((time.perf_counter() - start) * 1000)
+            tiles = len(inputs)
+            detections = extract_detections(result_obj)
+            defects += sum(1 for detection in detections if str(detection[1]).lower() != "ok")
+
+            if args.save_dir:
+                os.makedirs(args.save_dir, exist_ok=True)
+                name = os.path.splitext(os.path.basename(path))[0]
+                suffix = mode.replace(" ", "_")
+                cv2.imwrite(os.path.join(args.save_dir, f"{name}_{suffix}.png"), renderer.render(frame, detections))
+        rows.append((mode, tiles, durations, defects))
+
+    print(f"\n=== Inference modes ({len(files)} images) ===")
+    print(f"{'Mode':<14}{'inputs':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'defects':>9}")
+    for mode, tiles, durations, defects in rows:
+        print(f"{mode:<14}{tiles:>7}{sum(durations) / len(durations):>9.1f}{percentile(durations, 50):>9.1f}"
+              f"{percentile(durations, 95):>9.1f}{defects:>9}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 import sys
-import time
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtCore import QTimer
 from PySide6.QtGui import QFont
 from app.ui.main_window import DefectDetectionApp
+from app.model.detector import load_model_async
+from sqlite_database.src.db_operations import create_database
 
 def main():
     """Main entry point of the application."""
@@ -22,6 +23,9 @@ def main():
         font = QFont("Segoe UI", 10)
         app.setFont(font)
         
+        # The schema must exist before the model loads (it registers its classes in the defect catalog)
+        create_database()
+        
         # Try to create splash screen
         splash = None
         try:
@@ -30,21 +34,18 @@ def main():
             splash.show()
             splash.start_animations()
             
-            # Simulate loading process
-            loading_steps = [
-                ("Loading modules...", 10),
-                ("Initializing database...", 25),
-                ("Setting up camera...", 40),
-                ("Loading AI models...", 60),
-                ("Initializing barcode scanner...", 80),
-                ("Finalizing setup...", 95),
-                ("Ready!", 100)
-            ]
+            # Load and warm up the model in background, the splash reflects its real progress
+            model_progress = {"fraction": 0.0, "message": "Loading AI models..."}
+            
+            def on_model_progress(fraction, message):
+                model_progress["fraction"] = fraction
+                model_progress["message"] = message
             
-            # Show loading progress
-            for message, progress in loading_steps:
-                splash.showMessage(message, progress)
-                time.sleep(0.3)  # Reduced time for faster startup
+            loader = load_model_async(progress_callback=on_model_progress)
+            while loader.is_alive():
+                # Model loading/warm-up spans 20% -> 90% of the splash progress bar
+                splash.showMessage(model_progress["message"], 20 + int(model_progress["fraction"] * 70))
+                loader.join(0.05)
                 
         except Exception as e:
             print(f"⚠️ Splash screen error: {e}")
@@ -52,10 +53,12 @@ def main():
             if splash:
                 splash.close()
             splash = None
+            # Still warm up the model in background so the first inspection is fast
+            load_model_async()
         
-        # Create main window
+        # Create main window (it also opens the camera and starts the barcode scanner)
         if splash:
-            splash.showMessage("Loading main interface...", 100)
+            splash.showMessage("Loading main interface...", 95)
             
         main_window = DefectDetectionApp()
         
@@ -1,8 +1,45 @@
+-- Current schema (version 7). Existing databases are upgraded automatically
+-- by create_database() in sqlite_database/src/db_operations.py.
 CREATE TABLE IF NOT EXISTS detections (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     time TEXT,
     img_raw BLOB,
-    img_detect BLOB,,
+    img_detect BLOB,
     defect TEXT,
-    barcode TEXT
-);
\ No newline at end of file
+    barcode TEXT,
+    img_raw_hash TEXT,
+    img_detect_hash TEXT,
+    ts INTEGER,
+    img_raw_codec TEXT,
+    img_detect_codec TEXT,
+    inspection_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_detections_img_raw_hash ON detections(img_raw_hash);
+CREATE INDEX IF NOT EXISTS idx_detections_img_detect_hash ON detections(img_detect_hash);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections(ts, id);
+CREATE INDEX IF NOT EXISTS idx_detections_barcode ON detections(barcode);
+
+CREATE TABLE IF NOT EXISTS detection_defects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    detection_id INTEGER NOT NULL REFERENCES detections(id) ON DELETE CASCADE,
+    class_id INTEGER,
+    class_name TEXT NOT NULL,
+    confidence REAL,
+    x1 REAL,
+    y1 REAL,
+    x2 REAL,
+    y2 REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_detection_defects_class ON detection_defects(class_name, detection_id);
+CREATE INDEX IF NOT EXISTS idx_detection_defects_detection ON detection_defects(detection_id);
+
+CREATE TABLE IF NOT EXISTS thumbnails (
+    detection_id INTEGER NOT NULL REFERENCES detections(id) ON DELETE CASCADE,
+    image_type TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (detection_id, image_type)
+) WITHOUT ROWID;
+
+PRAGMA user_version = 6;
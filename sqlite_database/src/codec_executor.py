@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Threads encoding/decoding images (OpenCV releases the GIL, so they really run in parallel)
+CODEC_WORKERS = int(os.environ.get("CODEC_WORKERS", 0)) or min(8, os.cpu_count() or 2)
+# Jobs queued or running before submit() blocks, so a burst cannot pile up full frames in memory
+MAX_PENDING_PER_WORKER = 4
+
+THREAD_NAME_PREFIX = "codec"
+
+class CodecExecutor:
+    """
+    Shared thread pool for image encoding and decoding.
+
+    submit() returns a Future like a ThreadPoolExecutor, but at most
+    max_pending jobs are accepted at a time: further submit calls block
+    until a job finishes (backpressure, the wait is recorded in the stats).
+    A job submitted from a codec thread runs inline, so codec code may use
+    the executor itself without deadlocking the pool.
+    """
+
+    def __init__(self, workers=CODEC_WORKERS, max_pending=None):
+        """
+        Args:
+            workers (int): Number of codec threads.
+            max_pending (int): Jobs accepted before submit blocks (default: MAX_PENDING_PER_WORKER per worker).
+        """
+        self.workers = workers
+        self.max_pending = max_pending or workers * MAX_PENDING_PER_WORKER
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=THREAD_NAME_PREFIX)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "pending": 0,
+            "max_pending": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "blocked_ms": 0.0,
+        }
+
+    @staticmethod
+    def _in_codec_thread():
+        return threading.current_thread().name.startswith(THREAD_NAME_PREFIX)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on a codec thread.
+
+        Args:
+            func (callable): Encoding/decoding function, e.g. encode_image.
+
+        Returns:
+            concurrent.futures.Future: The pending result.
+        """
+        if self._in_codec_thread():
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            self._slots.acquire()
+            with self._lock:
+                self._stats["blocked_ms"] += (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["pending"] += 1
+            self._stats["max_pending"] = max(self._stats["max_pending"], self._stats["pending"])
+        try:
+            future = self._executor.submit(self._run, func, args, kwargs)
+        except RuntimeError:
+            # Executor already shut down (application closing): run in the caller
+            self._done(None)
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, func, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats["total_ms"] += elapsed_ms
+                self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._stats["pending"] -= 1
+            if future is not None:
+                failed = future.cancelled() or future.exception() is not None
+                self._stats["failed" if failed else "completed"] += 1
+
+    def map(self, func, items):
+        """
+        Apply func to every item in parallel and wait for all results.
+
+        Args:
+            func (callable): One-argument encoding/decoding function.
+            items (iterable): Inputs.
+
+        Returns:
+            list: Results in input order (exceptions are raised here, like Executor.map).
+        """
+        futures = [self.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self):
+        """
+        Get a snapshot of the executor counters.
+
+        Returns:
+            dict: Workers, job counters, current and maximum pending jobs, job run time
+                and time spent blocked in submit (ms).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        return stats
+
+_codec_executor = None
+_codec_executor_lock = threading.Lock()
+
+def get_codec_executor():
+    """
+    Get the shared codec executor, creating it on first use.
+
+    Returns:
+        CodecExecutor: The application-wide executor.
+    """
+    global _codec_executor
+    with _codec_executor_lock:
+        if _codec_executor is None:
+            _codec_executor = CodecExecutor()
+        return _codec_executor
+
+def stop_codec_executor(wait=True):
+    """Shut the shared executor down (queued jobs are finished when wait is True)."""
+    global _codec_executor
+    with _codec_executor_lock:
+        executor, _codec_executor = _codec_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
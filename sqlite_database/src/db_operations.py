@@ -1,10 +1,53 @@
 import sqlite3
+import threading
+import calendar
 from datetime import datetime
 from sqlite3 import Error
 import os
-import cv2
+from sqlite_database.src.image_store import put_image, get_image, delete_image, make_thumbnail
+from sqlite_database.src.image_codec import detect_codec, DEFAULT_CODEC
+from sqlite_database.src.codec_executor import get_codec_executor
 
 DB_PATH = 'sqlite_database/db/detections.db'
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Pragmas applied to every pooled connection. WAL lets the history tab read
+# while live detection writes; NORMAL sync is durable across app crashes in WAL mode.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-32000",      # 32 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",        # detection_defects rows follow their detection on delete
+)
+BUSY_TIMEOUT = 30  # seconds to wait on a locked database before failing
+
+# Image columns: encoded images live in the content-addressed image store and
+# the row keeps their hash in <column>_hash and their codec in <column>_codec
+# (NULL = png). The inline BLOB column is only populated by databases that have
+# not been migrated yet (see migrate_images.py).
+IMAGE_COLUMNS = ("img_raw", "img_detect")
+# Row IDs per "IN (...)" query (well below SQLite's bound-parameter limit)
+IN_QUERY_CHUNK_SIZE = 500
+# Selects whether each image exists without reading the image data itself
+_HAS_IMAGE_COLUMNS = ", ".join(f"({c}_hash IS NOT NULL OR {c} IS NOT NULL)" for c in IMAGE_COLUMNS)
+# Defect shown to the user: parts that could not be inspected have no defect, show why instead
+_DEFECT_DISPLAY = "COALESCE(defect, 'Not inspected: ' || inspection_error) AS defect"
+
+# Cached history counts: {(ts_from, ts_to, defect_filter): count}, kept up to date
+# by the write helpers below so paging never re-runs COUNT(*)
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+# Known defect classes, loaded once from detection_defects then maintained at write
+# time (and seeded with the model's class names) so the filter never scans the table
+_defect_catalog = None
+_defect_catalog_lock = threading.Lock()
+
+# One long-lived connection per thread: {thread ident: (thread, db path, connection)}
+_connections = {}
+_connections_lock = threading.Lock()
 
 # Global variable to store scanned barcode temporarily
 scanned_barcode = None
@@ -38,12 +81,80 @@ def reset_scanned_barcode():
     scanned_barcode = None
     print("Barcode reset")
 
+def _open_connection():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_connection():
+    """
+    Get the calling thread's pooled database connection, opening it on first use.
+
+    Connections are kept open for the lifetime of the thread and shared by all
+    helpers in this module. Connections of threads that have exited are closed
+    here as well.
+
+    Returns:
+        sqlite3.Connection: The connection owned by the current thread.
+    """
+    thread = threading.current_thread()
+    with _connections_lock:
+        entry = _connections.get(thread.ident)
+        if entry and entry[0] is thread and entry[1] == DB_PATH:
+            return entry[2]
+
+        # Close connections left behind by finished threads (or pointing at an old DB_PATH)
+        for ident, (owner, path, conn) in list(_connections.items()):
+            if not owner.is_alive() or owner is thread:
+                conn.close()
+                del _connections[ident]
+
+        conn = _open_connection()
+        _connections[thread.ident] = (thread, DB_PATH, conn)
+        return conn
+
+def close_connection():
+    """Close the calling thread's pooled connection, if any."""
+    thread = threading.current_thread()
+    with _connections_lock:
+        entry = _connections.pop(thread.ident, None)
+    if entry:
+        entry[2].close()
+
+def close_all_connections():
+    """Close every pooled connection (call on application shutdown)."""
+    with _connections_lock:
+        entries = list(_connections.values())
+        _connections.clear()
+    for _, _, conn in entries:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing database connection: {e}")
+
+def to_epoch(time_str):
+    """
+    Convert a 'YYYY-MM-DD[ HH:MM:SS]' wall-clock time to the integer stored in the 'ts' column.
+
+    The wall-clock time is interpreted as UTC, which matches SQLite's
+    strftime('%s', time) used to backfill existing rows.
+
+    Args:
+        time_str (str): Date or date-time string.
+
+    Returns:
+        int: Seconds since the epoch.
+    """
+    fmt = TIME_FORMAT if " " in time_str else "%Y-%m-%d"
+    return calendar.timegm(datetime.strptime(time_str, fmt).timetuple())
+
 #Helper function
 def execute_query(query, params=None, fetch=False):
     conn = None
     cursor = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         
         if params:
@@ -65,191 +176,465 @@ def execute_query(query, params=None, fetch=False):
     finally:
         if cursor:
             cursor.close()
-        if conn:
-            conn.close()
 
-def save_detection_to_db(img_raw, img_detect, defect, barcode=None):
+def extract_detections(result_obj):
     """
-    Save detection data to the SQLite database.
+    Extract structured box data from a YOLO result.
 
     Args:
-        img_raw (bytes): Raw image data (binary).
-        img_detect (bytes): Detected image data (binary).
-        defect (str): Detected defect description.
-        barcode (str): Barcode information (optional).
+        result_obj: A single YOLO result.
 
     Returns:
-        int: The row_id of the inserted record.
+        list: (class_id, class_name, confidence, x1, y1, x2, y2) tuples, one per box.
     """
-    global scanned_barcode
-    try:
-        # Use provided barcode or fall back to scanned_barcode
-        final_barcode = barcode if barcode is not None else scanned_barcode
-        
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        query = """
-        INSERT INTO detections (time, img_raw, img_detect, defect, barcode)
-        VALUES (?, ?, ?, ?, ?);
-        """
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query, (current_time, img_raw, img_detect, defect, final_barcode))
-        conn.commit()
-        row_id = cursor.lastrowid
-        conn.close()
-        
-        print(f"Detection saved to database with barcode: {final_barcode}")
-        return row_id
-    except Exception as e:
-        print(f"Error saving detection to database: {e}")
-        return None
+    classes = result_obj.names
+    boxes = result_obj.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    labels = boxes.cls.cpu().tolist()
+    confidences = boxes.conf.cpu().tolist()
+    coordinates = boxes.xyxy.cpu().tolist()
+    return [
+        (int(cls_id), classes[int(cls_id)], float(conf), *[float(v) for v in xyxy])
+        for cls_id, conf, xyxy in zip(labels, confidences, coordinates)
+    ]
 
-def update_detection_in_db(row_id, img_with_boxes, result_obj):
+def summarize_detections(detections):
     """
-    Update detection data in the SQLite database (without saving to disk).
+    Build the defect description stored in the 'defect' column from structured detections.
+
+    Args:
+        detections (list): Tuples as returned by extract_detections.
+
+    Returns:
+        str: Comma-separated sorted defect names, or "No defects".
     """
-    try:
-        # Encode image as binary data directly
-        _, img_encoded = cv2.imencode('.png', img_with_boxes)
-        img_detect = img_encoded.tobytes()
+    # Filter out OK class
+    defect_names = {d[1] for d in detections if d[1].lower() != "ok"}
+    if defect_names:
+        return ", ".join(sorted(defect_names))
+    return "No defects"
 
-        # Extract defect information
-        classes = result_obj.names
-        boxes = result_obj.boxes
-        labels = boxes.cls.cpu().tolist() if boxes is not None else []
+def summarize_defects(result_obj):
+    """
+    Build the defect description stored in the 'defect' column.
 
-        # Filter out OK class
-        defect_indices = [cls_id for cls_id in labels if classes[int(cls_id)].lower() != "ok"]
-        
-        if defect_indices:
-            defect_names = [classes[int(cls_id)] for cls_id in defect_indices]
-            unique_defects = list(set(defect_names))
-            defect_info = ", ".join(sorted(unique_defects))
-        else:
-            defect_info = "No defects"
+    Args:
+        result_obj: A single YOLO result.
+
+    Returns:
+        str: Comma-separated sorted defect names, or "No defects".
+    """
+    return summarize_detections(extract_detections(result_obj))
+
+def detections_from_summary(defect):
+    """
+    Rebuild detections (names only, no boxes) from a 'defect' column value.
 
-        # Update the database record
-        query = """
-        UPDATE detections
-        SET img_detect = ?, defect = ?
-        WHERE rowid = ?;
+    Args:
+        defect (str): Comma-separated defect names, "No defects" or None.
+
+    Returns:
+        list: (None, class_name, None, None, None, None, None) tuples.
+    """
+    if not defect or defect == "No defects":
+        return []
+    names = sorted({name.strip() for name in defect.split(",") if name.strip()})
+    return [(None, name, None, None, None, None, None) for name in names]
+
+def _insert_detection_defects(cursor, row_id, detections):
+    cursor.executemany(
         """
-        execute_query(query, (img_detect, defect_info, row_id))
-        print(f"Detection record {row_id} updated successfully.")
+        INSERT INTO detection_defects (detection_id, class_id, class_name, confidence, x1, y1, x2, y2)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(row_id, *detection) for detection in detections]
+    )
+
+def _save_thumbnails(cursor, row_id, thumbnails):
+    cursor.executemany(
+        "INSERT OR REPLACE INTO thumbnails (detection_id, image_type, data) VALUES (?, ?, ?)",
+        [(row_id, image_type, data) for image_type, data in (thumbnails or {}).items() if data]
+    )
+
+def save_detections_batch(operations):
+    """
+    Write a group of inserts in a single transaction.
+
+    Args:
+        operations (list): Tuples of ("insert", (time, img_raw, img_detect, defect, barcode, detections, thumbnails,
+            inspection_error)), with images already encoded, detections as returned by extract_detections,
+            thumbnails as {image_type: bytes} and inspection_error None for an inspected part.
+
+    Returns:
+        list: The row_id for each operation (same order), or None if the transaction failed.
+    """
+    conn = get_connection()
+    try:
+        # Write image files first so the transaction only holds the write lock for metadata
+        statements = []
+        for kind, values in operations:
+            if kind != "insert":
+                raise ValueError(f"Unknown operation: {kind}")
+            current_time, img_raw, img_detect, defect, barcode, detections, thumbnails, inspection_error = values
+            statements.append(((
+                current_time, to_epoch(current_time),
+                *_store_image(img_raw, "img_raw"), *_store_image(img_detect, "img_detect"),
+                defect, barcode, inspection_error
+            ), detections, thumbnails))
+
+        # One transaction for the whole group: committed on success, rolled back on error
+        with conn:
+            cursor = conn.cursor()
+            row_ids = []
+            for values, detections, thumbnails in statements:
+                cursor.execute(
+                    """
+                    INSERT INTO detections (time, ts, img_raw_hash, img_raw_codec, img_detect_hash, img_detect_codec,
+                                            defect, barcode, inspection_error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+                    """,
+                    values
+                )
+                row_id = cursor.lastrowid
+                _insert_detection_defects(cursor, row_id, detections)
+                _save_thumbnails(cursor, row_id, thumbnails)
+                row_ids.append(row_id)
+
+        for values, detections, _ in statements:
+            register_defect_types(detection[1] for detection in detections)
+            _update_cached_counts(values[1], values[6], detections, 1)
+        return row_ids
     except Exception as e:
-        print(f"Error updating detection in database: {e}")
+        print(f"Error writing detection batch to database: {e}")
+        return None
+
+def _migrate_v1(conn):
+    """Initial schema."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            time TEXT,
+            img_raw BLOB,
+            img_detect BLOB,
+            defect TEXT,
+            barcode TEXT
+        )
+    ''')
+
+def _add_column_if_missing(conn, table, column, column_type):
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def _migrate_v2(conn):
+    """Image store: images referenced by content hash instead of inline BLOBs."""
+    for column in IMAGE_COLUMNS:
+        _add_column_if_missing(conn, "detections", f"{column}_hash", "TEXT")
+        # Used to check whether an image file is still referenced before removing it
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_detections_{column}_hash ON detections({column}_hash)")
+
+def _migrate_v3(conn):
+    """Typed epoch timestamp with indexes for the history queries."""
+    _add_column_if_missing(conn, "detections", "ts", "INTEGER")
+    conn.execute("UPDATE detections SET ts = CAST(strftime('%s', time) AS INTEGER) WHERE ts IS NULL")
+    # Date range filter + ORDER BY ts DESC, id DESC are served by a single index scan
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections(ts, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_barcode ON detections(barcode)")
+
+def _migrate_v4(conn):
+    """Normalized per-detection defect table replacing LIKE filtering on 'defect'."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS detection_defects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            detection_id INTEGER NOT NULL REFERENCES detections(id) ON DELETE CASCADE,
+            class_id INTEGER,
+            class_name TEXT NOT NULL,
+            confidence REAL,
+            x1 REAL,
+            y1 REAL,
+            x2 REAL,
+            y2 REAL
+        )
+    ''')
+    # class_name first: defect filter and DISTINCT dropdown are index-only lookups
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detection_defects_class ON detection_defects(class_name, detection_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_detection_defects_detection ON detection_defects(detection_id)")
+
+    # Backfill names from the flattened 'defect' strings (no boxes are known for old rows)
+    cursor = conn.cursor()
+    rows = conn.execute(
+        "SELECT id, defect FROM detections WHERE defect IS NOT NULL AND defect != 'No defects'"
+    ).fetchall()
+    for row_id, defect in rows:
+        _insert_detection_defects(cursor, row_id, detections_from_summary(defect))
+
+def _migrate_v5(conn):
+    """Thumbnail table for the history view (generated at write time or on first view)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            detection_id INTEGER NOT NULL REFERENCES detections(id) ON DELETE CASCADE,
+            image_type TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (detection_id, image_type)
+        ) WITHOUT ROWID
+    ''')
+
+def _migrate_v6(conn):
+    """Codec of each stored image (NULL = png, the only format written before)."""
+    for column in IMAGE_COLUMNS:
+        _add_column_if_missing(conn, "detections", f"{column}_codec", "TEXT")
+
+def _migrate_v7(conn):
+    """Why a part could not be inspected (NULL = inspected); such rows have no defect."""
+    _add_column_if_missing(conn, "detections", "inspection_error", "TEXT")
+
+# Schema migrations, applied in order; PRAGMA user_version stores the current version
+MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+    (7, _migrate_v7),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate_schema():
+    """
+    Bring the database schema up to SCHEMA_VERSION.
+
+    Each migration runs in its own transaction together with the version bump,
+    so an interrupted upgrade resumes from the last completed version.
+
+    Returns:
+        int: The schema version after migration.
+    """
+    conn = get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target_version, migration in MIGRATIONS:
+        if target_version <= version:
+            continue
+        with conn:
+            conn.execute("BEGIN")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target_version}")
+        version = target_version
+        invalidate_count_cache()
+        invalidate_defect_catalog()
+        print(f"Database schema migrated to version {version}: {migration.__doc__}")
+    return version
 
 def create_database():
-    """Check if the database exists; if not, create it and initialize tables."""
+    """Check if the database exists; if not, create it. Then migrate the schema to the current version."""
     # Ensure the directory exists
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     
     # Check if the database file exists
     if not os.path.exists(DB_PATH):
-        try:
-            query = '''
-                CREATE TABLE IF NOT EXISTS detections (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    time TEXT,
-                    img_raw BLOB,
-                    img_detect BLOB,
-                    defect TEXT,
-                    barcode TEXT
-                )
-            '''
-            execute_query(query)
-            print(f"Database created at {DB_PATH}")
-        except Exception as e:
-            print(f"Error creating database: {str(e)}")
+        print(f"Database created at {DB_PATH}")
     else:
         print(f"Database already exists at {DB_PATH}")
+    
+    try:
+        migrate_schema()
+    except Exception as e:
+        print(f"Error migrating database schema: {str(e)}")
 
 def create_connection():
-    """Create a database connection to the SQLite database."""
+    """Get the current thread's pooled connection to the SQLite database (do not close it)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
+        return get_connection()
     except Error as e:
         print(e)
     return None
 
+def _load_defect_catalog():
+    """Load the defect catalog from the defect index on first use (caller holds the lock)."""
+    global _defect_catalog
+    if _defect_catalog is None:
+        query = "SELECT DISTINCT class_name FROM detection_defects WHERE lower(class_name) != 'ok'"
+        rows = execute_query(query, fetch=True)
+        if rows is None:
+            # Query failed (e.g. schema not created yet): don't cache, retry on next use
+            return set()
+        _defect_catalog = {row[0] for row in rows}
+    return _defect_catalog
+
 def get_defect_types():
-    """Fetch distinct defect types from the database."""
-    query = "SELECT DISTINCT defect FROM detections"
-    return execute_query(query, fetch=True)
+    """
+    Get the known defect class names (excluding "ok"), served from memory.
 
-def get_detections(date_from, date_to, defect_filter=None):
+    Returns:
+        list: Sorted defect class names.
     """
-    Fetch detection records based on filters.
+    with _defect_catalog_lock:
+        return sorted(_load_defect_catalog())
+
+def register_defect_types(names):
+    """
+    Add defect class names to the catalog (called at write time and when a model is loaded).
 
     Args:
-        date_from (str): Start date in 'YYYY-MM-DD' format.
-        date_to (str): End date in 'YYYY-MM-DD' format.
+        names (iterable): Class names, "ok" is ignored.
+
+    Returns:
+        bool: True if the catalog changed.
+    """
+    new_names = {name for name in names if name and name.lower() != "ok"}
+    with _defect_catalog_lock:
+        catalog = _load_defect_catalog()
+        if new_names <= catalog:
+            return False
+        catalog |= new_names
+        return True
+
+def invalidate_defect_catalog():
+    """Drop the in-memory defect catalog (it is reloaded on next use)."""
+    global _defect_catalog
+    with _defect_catalog_lock:
+        _defect_catalog = None
+
+def _defect_filter_condition(defect_filter):
+    """Build the WHERE condition (and its parameter) for a defect filter."""
+    if defect_filter == "No defects":
+        return " AND defect = ?", "No defects"
+    # Exact class match through idx_detection_defects_class
+    return " AND id IN (SELECT detection_id FROM detection_defects WHERE class_name = ?)", defect_filter
+
+def _normalize_defect_filter(defect_filter):
+    return defect_filter if defect_filter and defect_filter != "All" else "All"
+
+def _filter_matches(defect_filter, defect, detections):
+    if defect_filter == "All":
+        return True
+    if defect_filter == "No defects":
+        return defect == "No defects"
+    return any(detection[1] == defect_filter for detection in detections)
+
+def _update_cached_counts(ts, defect, detections, delta):
+    """Apply an inserted (delta=1) or deleted (delta=-1) record to every matching cached count."""
+    with _count_cache_lock:
+        for key in _count_cache:
+            ts_from, ts_to, defect_filter = key
+            if ts is not None and ts_from <= ts < ts_to and _filter_matches(defect_filter, defect, detections):
+                _count_cache[key] += delta
+
+def invalidate_count_cache():
+    """Drop every cached history count (they are recomputed on next use)."""
+    with _count_cache_lock:
+        _count_cache.clear()
+
+def count_detections(date_from, date_to, defect_filter=None):
+    """
+    Count detection records matching the filters.
+
+    The result is cached per filter and maintained incrementally on insert and
+    delete, so repeated calls (e.g. on every page change) cost nothing.
+
+    Args:
+        date_from (str): Start date in 'YYYY-MM-DD' format (inclusive).
+        date_to (str): End date in 'YYYY-MM-DD' format (exclusive).
         defect_filter (str): Filter for defect type (optional).
 
     Returns:
-        list: List of detection records.
+        int: Number of matching records.
     """
-    query = "SELECT rowid, time, img_raw, img_detect, defect, barcode FROM detections WHERE time BETWEEN ? AND ?"
-    params = [date_from, date_to]
+    defect_filter = _normalize_defect_filter(defect_filter)
+    key = (to_epoch(date_from), to_epoch(date_to), defect_filter)
+    with _count_cache_lock:
+        if key in _count_cache:
+            return _count_cache[key]
 
-    if defect_filter and defect_filter != "All":
-        if defect_filter == "No defects":
-            query += " AND defect = ?"
-            params.append("No defects")
-        else:
-            query += " AND defect LIKE ?"
-            params.append(f"%{defect_filter}%")
+    query = "SELECT COUNT(*) FROM detections WHERE ts >= ? AND ts < ?"
+    params = [key[0], key[1]]
+    if defect_filter != "All":
+        condition, value = _defect_filter_condition(defect_filter)
+        query += condition
+        params.append(value)
+    result = execute_query(query, params, fetch=True)
+    if not result:
+        return 0
+
+    with _count_cache_lock:
+        _count_cache[key] = result[0][0]
+    return result[0][0]
 
-    query += " ORDER BY time DESC"
-    return execute_query(query, params, fetch=True)
+def _history_query(date_from, date_to, defect_filter):
+    """Build the metadata SELECT of the history view (and its parameters) for the filters."""
+    query = f"SELECT rowid, time, {_HAS_IMAGE_COLUMNS}, {_DEFECT_DISPLAY}, barcode, ts FROM detections WHERE ts >= ? AND ts < ?"
+    params = [to_epoch(date_from), to_epoch(date_to)]
 
-def get_detections_paginated(date_from, date_to, defect_filter=None, page=1, page_size=10):
+    defect_filter = _normalize_defect_filter(defect_filter)
+    if defect_filter != "All":
+        condition, value = _defect_filter_condition(defect_filter)
+        query += condition
+        params.append(value)
+    return query, params
+
+def get_detection_record(row_id, date_from, date_to, defect_filter=None):
     """
-    Fetch detection records with pagination.
-    
+    Fetch the history metadata of one record if it matches the filters.
+
     Args:
-        date_from (str): Start date in 'YYYY-MM-DD' format.
-        date_to (str): End date in 'YYYY-MM-DD' format.
+        row_id (int): The ID of the detection record.
+        date_from (str): Start date in 'YYYY-MM-DD' format (inclusive).
+        date_to (str): End date in 'YYYY-MM-DD' format (exclusive).
+        defect_filter (str): Filter for defect type (optional).
+
+    Returns:
+        tuple: (rowid, time, has_img_raw, has_img_detect, defect, barcode, ts), or None if the
+            record does not exist or does not match the filters.
+    """
+    query, params = _history_query(date_from, date_to, defect_filter)
+    result = execute_query(query + " AND id = ?", params + [row_id], fetch=True)
+    return result[0] if result else None
+
+def get_detections_page(date_from, date_to, defect_filter=None, page_size=10, cursor=None):
+    """
+    Fetch the records following a cursor using keyset (seek) pagination.
+
+    Instead of OFFSET, the page is located relative to a cursor, the (ts, id)
+    of the last row already loaded, so every page costs the same regardless of its depth.
+
+    Args:
+        date_from (str): Start date in 'YYYY-MM-DD' format (inclusive).
+        date_to (str): End date in 'YYYY-MM-DD' format (exclusive).
         defect_filter (str): Filter for defect type (optional).
-        page (int): Page number (1-based).
         page_size (int): Number of records per page.
-    
+        cursor (tuple): (ts, id) of the last loaded row, None for the newest page.
+
     Returns:
-        tuple: (records, total_count)
+        list: (rowid, time, has_img_raw, has_img_detect, defect, barcode, ts) records, newest first.
     """
-    # Base query
-    base_query = "SELECT rowid, time, img_raw, img_detect, defect, barcode FROM detections WHERE time BETWEEN ? AND ?"
-    count_query = "SELECT COUNT(*) FROM detections WHERE time BETWEEN ? AND ?"
-    
-    params = [date_from, date_to]
-    
-    # Add defect filter if specified
-    if defect_filter and defect_filter != "All":
-        filter_condition = ""
-        if defect_filter == "No defects":
-            filter_condition = " AND defect = ?"
-            params.append("No defects")
-        else:
-            filter_condition = " AND defect LIKE ?"
-            params.append(f"%{defect_filter}%")
-        
-        base_query += filter_condition
-        count_query += filter_condition
-    
-    # Get total count
-    total_result = execute_query(count_query, params, fetch=True)
-    total_count = total_result[0][0] if total_result else 0
-    
-    # Add pagination to main query
-    base_query += " ORDER BY time DESC LIMIT ? OFFSET ?"
-    offset = (page - 1) * page_size
-    params.extend([page_size, offset])
-    
-    # Get paginated records
-    records = execute_query(base_query, params, fetch=True) or []
-    
-    return records, total_count
+    query, params = _history_query(date_from, date_to, defect_filter)
+
+    if cursor is not None:
+        query += " AND (ts, id) < (?, ?)"
+        params.extend(cursor)
+
+    # Walk the (ts, id) index backwards: older records follow
+    query += " ORDER BY ts DESC, id DESC LIMIT ?"
+    params.append(page_size)
+
+    return execute_query(query, params, fetch=True) or []
+
+def _check_image_type(image_type):
+    if image_type not in IMAGE_COLUMNS:
+        raise ValueError(f"Unknown image type: {image_type}")
+
+def _store_image(data, image_type):
+    """Put encoded image data in the image store: (hash, codec), or (None, None) without data."""
+    if not data:
+        return None, None
+    return put_image(data, image_type), detect_codec(data) or DEFAULT_CODEC
+
+def _resolve_image(image_hash, inline_data, image_type, codec=None):
+    """Load image data from the image store, falling back to a not yet migrated inline BLOB."""
+    if image_hash:
+        return get_image(image_hash, image_type, codec)
+    return inline_data or None
 
 def get_image_data(row_id, image_type):
     """
@@ -262,20 +647,105 @@ def get_image_data(row_id, image_type):
     Returns:
         bytes: Image data as binary.
     """
-    query = f"SELECT {image_type} FROM detections WHERE rowid = ?"
+    _check_image_type(image_type)
+    query = f"SELECT {image_type}_hash, {image_type}, {image_type}_codec FROM detections WHERE rowid = ?"
     result = execute_query(query, (row_id,), fetch=True)
-    return result[0][0] if result and result[0][0] else None
+    if not result:
+        return None
+    return _resolve_image(result[0][0], result[0][1], image_type, result[0][2])
+
+def get_images_data(row_ids, image_type, chunk_size=IN_QUERY_CHUNK_SIZE):
+    """
+    Fetch image data (raw or detection) for several row IDs, one query per chunk of IDs.
+
+    Args:
+        row_ids (list): The IDs of the detection records.
+        image_type (str): The column name ('img_raw' or 'img_detect').
+        chunk_size (int): Maximum number of IDs per query.
+
+    Returns:
+        dict: Mapping of row ID to image data (bytes), rows without data are omitted.
+    """
+    _check_image_type(image_type)
+    row_ids = list(row_ids)
+    images = {}
+    # Bounded IN (...) lists: SQLite caps the number of parameters of a statement
+    for start in range(0, len(row_ids), chunk_size):
+        chunk = row_ids[start:start + chunk_size]
+        placeholders = ", ".join("?" for _ in chunk)
+        query = f"SELECT rowid, {image_type}_hash, {image_type}, {image_type}_codec FROM detections WHERE rowid IN ({placeholders})"
+        for row_id, image_hash, inline_data, codec in execute_query(query, chunk, fetch=True) or []:
+            data = _resolve_image(image_hash, inline_data, image_type, codec)
+            if data:
+                images[row_id] = data
+    return images
+
+def get_thumbnails(row_ids, image_type):
+    """
+    Fetch history thumbnails for several row IDs, generating missing ones on first view.
+
+    Args:
+        row_ids (list): The IDs of the detection records.
+        image_type (str): 'img_raw' or 'img_detect'.
+
+    Returns:
+        dict: Mapping of row ID to JPEG thumbnail data, rows without an image are omitted.
+    """
+    _check_image_type(image_type)
+    if not row_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in row_ids)
+    query = f"SELECT detection_id, data FROM thumbnails WHERE image_type = ? AND detection_id IN ({placeholders})"
+    thumbnails = dict(execute_query(query, [image_type, *row_ids], fetch=True) or [])
+
+    # Older records: build the thumbnail once from the full image and keep it
+    missing = [row_id for row_id in row_ids if row_id not in thumbnails]
+    if missing:
+        images = get_images_data(missing, image_type)
+        # Decode + resize every missing image in parallel on the codec threads
+        thumbnails_built = get_codec_executor().map(make_thumbnail, images.values())
+        generated = {row_id: thumbnail for row_id, thumbnail in zip(images, thumbnails_built) if thumbnail}
+        if generated:
+            conn = get_connection()
+            try:
+                with conn:
+                    for row_id, thumbnail in generated.items():
+                        _save_thumbnails(conn.cursor(), row_id, {image_type: thumbnail})
+            except sqlite3.Error as e:
+                print(f"Error saving thumbnails: {e}")
+            thumbnails.update(generated)
+    return thumbnails
 
 def delete_detection_from_db(row_id):
     """
     Delete a detection record from the database by its row ID.
 
+    Image files that are no longer referenced by any record are removed from the store.
+
     Args:
         row_id (int): The ID of the detection record to delete.
     """
     try:
+        hashes = execute_query(
+            "SELECT img_raw_hash, img_detect_hash, ts, defect, img_raw_codec, img_detect_codec FROM detections WHERE rowid = ?",
+            (row_id,), fetch=True
+        )
+        detections = execute_query(
+            "SELECT class_id, class_name FROM detection_defects WHERE detection_id = ?", (row_id,), fetch=True
+        ) or []
         query = "DELETE FROM detections WHERE rowid = ?"
-        execute_query(query, (row_id,))
+        if execute_query(query, (row_id,)) and hashes:
+            _update_cached_counts(hashes[0][2], hashes[0][3], detections, -1)
+        
+        if hashes:
+            for image_type, image_hash, codec in zip(IMAGE_COLUMNS, hashes[0][:2], hashes[0][4:]):
+                if not image_hash:
+                    continue
+                still_used = execute_query(
+                    f"SELECT 1 FROM detections WHERE {image_type}_hash = ? LIMIT 1", (image_hash,), fetch=True
+                )
+                if not still_used:
+                    delete_image(image_hash, image_type, codec)
         print(f"Detection #{row_id} deleted successfully.")
     except Exception as e:
         print(f"Error deleting detection #{row_id}: {str(e)}")
@@ -290,11 +760,22 @@ def get_detection_for_export(row_id):
     Returns:
         tuple: (time_str, img_raw, img_detect, defect, barcode) or None if not found
     """
-    query = "SELECT time, img_raw, img_detect, defect, barcode FROM detections WHERE rowid = ?"
+    query = f"""
+    SELECT time, img_raw_hash, img_raw, img_detect_hash, img_detect, {_DEFECT_DISPLAY}, barcode,
+           img_raw_codec, img_detect_codec
+    FROM detections WHERE rowid = ?
+    """
     result = execute_query(query, (row_id,), fetch=True)
     
     if result and len(result) > 0:
-        return result[0]  # Return the first (and should be only) result
+        time_str, raw_hash, img_raw, detect_hash, img_detect, defect, barcode, raw_codec, detect_img_codec = result[0]
+        return (
+            time_str,
+            _resolve_image(raw_hash, img_raw, "img_raw", raw_codec),
+            _resolve_image(detect_hash, img_detect, "img_detect", detect_img_codec),
+            defect,
+            barcode,
+        )
     return None
 
 def get_detection_summary(row_id):
@@ -307,7 +788,7 @@ def get_detection_summary(row_id):
     Returns:
         tuple: (time_str, defect, barcode) or None if not found
     """
-    query = "SELECT time, defect, barcode FROM detections WHERE rowid = ?"
+    query = f"SELECT time, {_DEFECT_DISPLAY}, barcode FROM detections WHERE rowid = ?"
     result = execute_query(query, (row_id,), fetch=True)
     
     if result and len(result) > 0:
@@ -0,0 +1,147 @@
+import os
+import struct
+import cv2
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for the raw-zstd preset
+    zstandard = None
+
+# Stored image formats and their file extension in the image store. The codec of
+# each image is recorded in the detections row (NULL = png, written before codecs existed)
+CODECS = {
+    "png": ".png",
+    "webp": ".webp",
+    "jpeg": ".jpg",
+    "raw-zstd": ".rawz",
+}
+DEFAULT_CODEC = "png"
+
+# raw-zstd: header (magic, height, width, channels) followed by the zstd-compressed uint8 pixels
+RAW_ZSTD_MAGIC = b"RAWZ"
+RAW_ZSTD_HEADER = struct.Struct("<4sIIB")
+RAW_ZSTD_LEVEL = 3
+
+# Encoding presets: name -> (codec, OpenCV imwrite parameters or zstd level)
+PRESETS = {
+    "png": ("png", [cv2.IMWRITE_PNG_COMPRESSION, 3]),          # OpenCV default, what was always stored
+    "png-fast": ("png", [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+    "webp-lossless": ("webp", [cv2.IMWRITE_WEBP_QUALITY, 101]),  # Quality > 100 means lossless
+    "jpeg-hq": ("jpeg", [cv2.IMWRITE_JPEG_QUALITY, 95]),
+    "raw-zstd": ("raw-zstd", RAW_ZSTD_LEVEL),
+}
+
+# Preset per image type: raw frames stay lossless (they are the inspection evidence),
+# annotated images are derived from them and only need to look right
+IMAGE_PRESETS = {
+    "img_raw": os.environ.get("IMAGE_CODEC_RAW", "png-fast"),
+    "img_detect": os.environ.get("IMAGE_CODEC_DETECT", "jpeg-hq"),
+}
+
+_warned_presets = set()
+
+def available_presets():
+    """
+    Get the presets usable in this environment.
+
+    Returns:
+        list: Preset names (raw-zstd only if the zstandard package is installed).
+    """
+    return [name for name, (codec, _) in PRESETS.items() if codec != "raw-zstd" or zstandard is not None]
+
+def preset_for(image_type):
+    """
+    Get the configured encoding preset of an image type.
+
+    Args:
+        image_type (str): 'img_raw' or 'img_detect'.
+
+    Returns:
+        str: The preset name, "png" if the configured one is unknown or unavailable.
+    """
+    preset = IMAGE_PRESETS.get(image_type, "png")
+    if preset not in available_presets():
+        if preset not in _warned_presets:
+            _warned_presets.add(preset)
+            print(f"[!] Image codec preset '{preset}' is not available, using 'png' for {image_type}")
+        return "png"
+    return preset
+
+def encode_image(image, preset="png"):
+    """
+    Encode a frame with a preset.
+
+    Args:
+        image (numpy.ndarray): BGR (or grayscale) uint8 image.
+        preset (str): Preset name from PRESETS.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown image codec preset: {preset}")
+    codec, params = PRESETS[preset]
+    if codec == "raw-zstd":
+        if zstandard is None:
+            raise RuntimeError("The raw-zstd preset needs the zstandard package")
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        channels = image.shape[2] if image.ndim == 3 else 1
+        header = RAW_ZSTD_HEADER.pack(RAW_ZSTD_MAGIC, image.shape[0], image.shape[1], channels)
+        return header + zstandard.ZstdCompressor(level=params).compress(image.tobytes())
+
+    ok, encoded = cv2.imencode(CODECS[codec], image, params)
+    if not ok:
+        raise ValueError(f"Encoding with preset {preset} failed")
+    return encoded.tobytes()
+
+def detect_codec(data):
+    """
+    Identify the codec of encoded image data from its signature.
+
+    Args:
+        data (bytes): Encoded image data.
+
+    Returns:
+        str: Codec name from CODECS, or None if unknown.
+    """
+    if not data:
+        return None
+    head = bytes(data[:12])
+    if head.startswith(b"\x89PNG"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(RAW_ZSTD_MAGIC):
+        return "raw-zstd"
+    return None
+
+def decode_image(data, codec=None):
+    """
+    Decode stored image data into a BGR frame.
+
+    Args:
+        data (bytes): Encoded image data.
+        codec (str): Codec recorded with the image (optional, detected from the data otherwise).
+
+    Returns:
+        numpy.ndarray: The decoded image, or None if the data could not be decoded.
+    """
+    if not data:
+        return None
+    codec = codec or detect_codec(data)
+    if codec == "raw-zstd":
+        if zstandard is None:
+            print("[!] Cannot decode raw-zstd image: the zstandard package is not installed")
+            return None
+        try:
+            _, height, width, channels = RAW_ZSTD_HEADER.unpack_from(data)
+            pixels = zstandard.ZstdDecompressor().decompress(bytes(data[RAW_ZSTD_HEADER.size:]))
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            return np.frombuffer(pixels, np.uint8).reshape(shape).copy()
+        except Exception as e:
+            print(f"[!] Cannot decode raw-zstd image: {e}")
+            return None
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
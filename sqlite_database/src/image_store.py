@@ -0,0 +1,128 @@
+import hashlib
+import os
+import threading
+import cv2
+from sqlite_database.src.image_codec import CODECS, DEFAULT_CODEC, detect_codec, decode_image
+
+# Content-addressed image files, one root directory per image type
+# (file extension follows the codec of the image, see image_codec.py)
+IMAGE_DIRS = {
+    "img_raw": "storage/captured_images",
+    "img_detect": "storage/detected_images",
+}
+
+# History table thumbnails (width, height), stored as small JPEGs
+THUMBNAIL_SIZE = (90, 60)
+THUMBNAIL_JPEG_QUALITY = 85
+
+def image_hash(data):
+    """
+    Compute the content address of encoded image data.
+
+    Args:
+        data (bytes): Encoded image data.
+
+    Returns:
+        str: SHA-256 hex digest of the data.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def image_path(digest, image_type, codec=None):
+    """
+    Get the file path of an image in the store.
+
+    Args:
+        digest (str): Content hash of the image.
+        image_type (str): 'img_raw' or 'img_detect'.
+        codec (str): Codec of the image (optional, defaults to png).
+
+    Returns:
+        str: Path of the image file (sharded by the first two hash characters).
+    """
+    if image_type not in IMAGE_DIRS:
+        raise ValueError(f"Unknown image type: {image_type}")
+    extension = CODECS.get(codec or DEFAULT_CODEC, CODECS[DEFAULT_CODEC])
+    return os.path.join(IMAGE_DIRS[image_type], digest[:2], f"{digest}{extension}")
+
+def put_image(data, image_type):
+    """
+    Store encoded image data and return its content hash.
+
+    Identical images are stored once. Files are written to a temporary name
+    and renamed, so readers never see a partially written image.
+
+    Args:
+        data (bytes): Encoded image data.
+        image_type (str): 'img_raw' or 'img_detect'.
+
+    Returns:
+        str: Content hash referencing the stored image, or None if data is empty.
+    """
+    if not data:
+        return None
+    digest = image_hash(data)
+    path = image_path(digest, image_type, detect_codec(data))
+    if os.path.exists(path):
+        return digest
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest
+
+def get_image(digest, image_type, codec=None):
+    """
+    Read encoded image data from the store.
+
+    Args:
+        digest (str): Content hash of the image.
+        image_type (str): 'img_raw' or 'img_detect'.
+        codec (str): Codec recorded with the image (optional, defaults to png).
+
+    Returns:
+        bytes: Encoded image data, or None if not found.
+    """
+    if not digest:
+        return None
+    try:
+        with open(image_path(digest, image_type, codec), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        print(f"Image {digest} not found in {image_type} store")
+        return None
+
+def delete_image(digest, image_type, codec=None):
+    """
+    Remove an image file from the store (caller must check it is no longer referenced).
+
+    Args:
+        digest (str): Content hash of the image.
+        image_type (str): 'img_raw' or 'img_detect'.
+        codec (str): Codec recorded with the image (optional, defaults to png).
+    """
+    if not digest:
+        return
+    try:
+        os.remove(image_path(digest, image_type, codec))
+    except FileNotFoundError:
+        pass
+
+def make_thumbnail(image):
+    """
+    Build a history-table thumbnail.
+
+    Args:
+        image (numpy.ndarray | bytes): BGR frame, or encoded image data.
+
+    Returns:
+        bytes: JPEG-encoded thumbnail, or None if the image could not be read.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = decode_image(image)
+    if image is None:
+        return None
+    thumbnail = cv2.resize(image, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", thumbnail, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_JPEG_QUALITY])
+    return encoded.tobytes() if ok else None
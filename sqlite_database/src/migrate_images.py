@@ -0,0 +1,89 @@
+"""
+Move inline image BLOBs of an existing detections.db into the content-addressed image store.
+
+Usage:
+    python -m sqlite_database.src.migrate_images [--db PATH] [--batch-size N] [--vacuum]
+"""
+import argparse
+import os
+import sys
+from sqlite_database.src import db_operations
+from sqlite_database.src.image_store import put_image
+from sqlite_database.src.image_codec import detect_codec, DEFAULT_CODEC
+
+def _codec(data):
+    return (detect_codec(data) or DEFAULT_CODEC) if data else None
+
+def migrate_images(batch_size=100, vacuum=False):
+    """
+    Move img_raw/img_detect BLOBs into the image store and replace them by hashes.
+
+    Rows are migrated in batches, each batch committed on its own, so the
+    migration can be interrupted and resumed safely.
+
+    Args:
+        batch_size (int): Number of rows migrated per transaction.
+        vacuum (bool): Run VACUUM afterwards to give the freed space back to the OS.
+
+    Returns:
+        int: Number of migrated rows.
+    """
+    db_operations.create_database()
+    conn = db_operations.get_connection()
+    migrated = 0
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT rowid, img_raw, img_detect FROM detections
+            WHERE img_raw IS NOT NULL OR img_detect IS NOT NULL
+            LIMIT ?
+            """,
+            (batch_size,)
+        ).fetchall()
+        if not rows:
+            break
+
+        with conn:
+            for row_id, img_raw, img_detect in rows:
+                conn.execute(
+                    """
+                    UPDATE detections
+                    SET img_raw_hash = COALESCE(?, img_raw_hash), img_raw = NULL,
+                        img_raw_codec = COALESCE(?, img_raw_codec),
+                        img_detect_hash = COALESCE(?, img_detect_hash), img_detect = NULL,
+                        img_detect_codec = COALESCE(?, img_detect_codec)
+                    WHERE rowid = ?
+                    """,
+                    (put_image(img_raw, "img_raw"), _codec(img_raw),
+                     put_image(img_detect, "img_detect"), _codec(img_detect), row_id)
+                )
+        migrated += len(rows)
+        print(f"Migrated {migrated} records...")
+
+    if vacuum:
+        print("Running VACUUM...")
+        conn.execute("VACUUM")
+    print(f"Image migration complete: {migrated} records moved to the image store")
+    return migrated
+
+def main():
+    parser = argparse.ArgumentParser(description="Move detection images out of the SQLite database")
+    parser.add_argument("--db", default=db_operations.DB_PATH, help="Path to detections.db")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows migrated per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="Compact the database file afterwards")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+
+    db_operations.DB_PATH = args.db
+    try:
+        migrate_images(args.batch_size, args.vacuum)
+    finally:
+        db_operations.close_all_connections()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+import numpy as np
+from sqlite_database.src.db_operations import (
+    save_detections_batch, extract_detections, summarize_detections,
+    detections_from_summary, get_scanned_barcode
+)
+from sqlite_database.src.image_store import make_thumbnail
+from sqlite_database.src.image_codec import encode_image, preset_for
+from sqlite_database.src.codec_executor import get_codec_executor
+from app.inspection.metrics import timed
+
+# Default sizing of the write-behind queue
+MAX_QUEUE_SIZE = 64
+MAX_BATCH_SIZE = 16
+
+_STOP = object()
+
+class PersistenceWorker(threading.Thread):
+    """
+    Write-behind persistence worker for detections.
+
+    Inspections are submitted to a bounded queue and written by this thread
+    in grouped transactions, so the GUI thread never blocks on image encoding
+    or disk I/O. When the queue is full, submit calls block (backpressure)
+    and the wait is recorded in the metrics.
+    """
+
+    def __init__(self, max_queue_size=MAX_QUEUE_SIZE, max_batch_size=MAX_BATCH_SIZE):
+        super().__init__(name="PersistenceWorker", daemon=True)
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.max_batch_size = max_batch_size
+
+        # Number of submitted jobs not yet written (used by flush)
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._stopped = False
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_batch_ms": 0.0,
+            "total_batch_ms": 0.0,
+            "max_batch_ms": 0.0,
+            "max_queue_depth": 0,
+            "backpressure_waits": 0,
+            "backpressure_wait_ms": 0.0,
+        }
+
+    def submit_insert(self, img_raw, img_with_boxes, result_obj, barcode=None, callback=None,
+                      thumbnails=None, capture_time=None, inspection_error=None):
+        """
+        Queue a new detection record.
+
+        Args:
+            img_raw (numpy.ndarray | bytes): Raw frame, or already encoded image data.
+            img_with_boxes (numpy.ndarray | bytes): Annotated frame, or already encoded image data.
+            result_obj: A single YOLO result (or a ready defect string).
+            barcode (str): Barcode information (optional, defaults to the scanned barcode).
+            callback (callable): Optional callback(row_id), called from the worker thread after commit
+                (row_id is None if the record could not be written).
+            thumbnails (dict): Ready thumbnails {image_type: JPEG bytes} (optional, built here from
+                numpy frames otherwise).
+            capture_time (datetime): When the part was captured (optional, defaults to now).
+            inspection_error (str): Why the part could not be inspected (optional); the record then
+                has no defect and result_obj should be None.
+        """
+        # Time and barcode belong to the part at capture time, not at write time
+        current_time = (capture_time or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        final_barcode = barcode if barcode is not None else get_scanned_barcode()
+        self._submit(("insert", (current_time, img_raw, img_with_boxes, result_obj, final_barcode, thumbnails,
+                                 inspection_error), callback))
+
+    def _submit(self, job):
+        if self._stopped:
+            raise RuntimeError("Persistence worker is stopped")
+        with self._pending_cond:
+            self._pending += 1
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            # Backpressure: block the producer until the writer catches up
+            wait_start = time.perf_counter()
+            self.queue.put(job)
+            with self._metrics_lock:
+                self._metrics["backpressure_waits"] += 1
+                self._metrics["backpressure_wait_ms"] += (time.perf_counter() - wait_start) * 1000
+        with self._metrics_lock:
+            self._metrics["submitted"] += 1
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], self.queue.qsize())
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is _STOP:
+                break
+
+            # Group everything already waiting into the same transaction
+            jobs = [job]
+            stop_requested = False
+            while len(jobs) < self.max_batch_size:
+                try:
+                    next_job = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_job is _STOP:
+                    stop_requested = True
+                    break
+                jobs.append(next_job)
+
+            self._write_batch(jobs)
+            if stop_requested:
+                break
+
+    def _write_batch(self, jobs):
+        batch_start = time.perf_counter()
+        operations = []
+        callbacks = []
+        failed_callbacks = []
+        # Several jobs with frames to encode: prepare them side by side on the codec threads
+        # (their encoders then run inline), already encoded jobs are cheap enough to prepare here
+        if len(jobs) > 1 and any(isinstance(value, np.ndarray) for _, values, _ in jobs for value in values):
+            executor = get_codec_executor()
+            prepared = [executor.submit(self._prepare, kind, values) for kind, values, _ in jobs]
+        else:
+            prepared = [None] * len(jobs)
+        for (kind, values, callback), future in zip(jobs, prepared):
+            try:
+                operations.append((kind, future.result() if future else self._prepare(kind, values)))
+                callbacks.append(callback)
+            except Exception as e:
+                print(f"Error preparing detection for database: {e}")
+                failed_callbacks.append(callback)
+                with self._metrics_lock:
+                    self._metrics["failed"] += 1
+
+        row_ids = []
+        if operations:
+            # One transaction for the whole batch
+            with timed("db_insert"):
+                row_ids = save_detections_batch(operations)
+
+        with self._metrics_lock:
+            self._metrics["batches"] += 1
+            self._metrics["last_batch_size"] = len(jobs)
+            batch_ms = (time.perf_counter() - batch_start) * 1000
+            self._metrics["last_batch_ms"] = batch_ms
+            self._metrics["total_batch_ms"] += batch_ms
+            self._metrics["max_batch_ms"] = max(self._metrics["max_batch_ms"], batch_ms)
+            if row_ids is None:
+                self._metrics["failed"] += len(operations)
+            else:
+                self._metrics["written"] += len(operations)
+
+        if row_ids is None:
+            failed_callbacks.extend(callbacks)
+            row_ids = []
+        results = list(zip(row_ids, callbacks)) + [(None, callback) for callback in failed_callbacks]
+        for row_id, callback in results:
+            if callback:
+                try:
+                    callback(row_id)
+                except Exception as e:
+                    print(f"Error in persistence callback: {e}")
+
+        with self._pending_cond:
+            self._pending -= len(jobs)
+            self._pending_cond.notify_all()
+
+    @staticmethod
+    def _encode(image, image_type):
+        if image is None or isinstance(image, (bytes, bytearray)):
+            return image
+        if isinstance(image, np.ndarray):
+            with timed("image_encode"):
+                return encode_image(image, preset_for(image_type))
+        raise TypeError(f"Unsupported image type: {type(image)}")
+
+    @classmethod
+    def _encode_async(cls, image, image_type):
+        """Start encoding a frame on the codec threads (encoded or missing images are passed through)."""
+        if isinstance(image, np.ndarray):
+            return get_codec_executor().submit(cls._encode, image, image_type)
+        future = Future()
+        future.set_result(cls._encode(image, image_type))
+        return future
+
+    @staticmethod
+    def _defect_info(result_obj):
+        """Get (defect description, structured detections) from a YOLO result or a defect string."""
+        if result_obj is None or isinstance(result_obj, str):
+            return result_obj, detections_from_summary(result_obj)
+        detections = extract_detections(result_obj)
+        return summarize_detections(detections), detections
+
+    @staticmethod
+    def _thumbnail(image):
+        with timed("thumbnail"):
+            return make_thumbnail(image)
+
+    @classmethod
+    def _thumbnails(cls, **images):
+        """Start building thumbnails from in-memory frames (encoded images get theirs lazily on first view)."""
+        executor = get_codec_executor()
+        return {
+            image_type: executor.submit(cls._thumbnail, image)
+            for image_type, image in images.items()
+            if isinstance(image, np.ndarray)
+        }
+
+    def _prepare(self, kind, values):
+        # Image encoding, thumbnails and defect extraction happen here, on the worker thread,
+        # the encoders themselves run in parallel on the codec threads
+        current_time, img_raw, img_with_boxes, result_obj, barcode, thumbnails, inspection_error = values
+        raw = self._encode_async(img_raw, "img_raw")
+        detect = self._encode_async(img_with_boxes, "img_detect")
+        pending_thumbnails = self._thumbnails(img_raw=img_raw, img_detect=img_with_boxes) if thumbnails is None else {}
+        defect, detections = self._defect_info(result_obj)
+        if thumbnails is None:
+            thumbnails = {image_type: future.result() for image_type, future in pending_thumbnails.items()}
+        return (current_time, raw.result(), detect.result(), defect, barcode, detections, thumbnails,
+                inspection_error)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every submitted job has been written.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds (optional).
+
+        Returns:
+            bool: True if the queue was fully drained.
+        """
+        with self._pending_cond:
+            return self._pending_cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout=None):
+        """
+        Flush pending jobs and stop the worker thread.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds (optional).
+
+        Returns:
+            bool: True if everything was written before the worker stopped.
+        """
+        self._stopped = True
+        if not self.is_alive():
+            return self._pending == 0
+        self.queue.put(_STOP)
+        self.join(timeout)
+        return self._pending == 0
+
+    def get_metrics(self):
+        """
+        Get a snapshot of the persistence metrics.
+
+        Returns:
+            dict: Counters, queue depth and timing of the last batch.
+        """
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self.queue.qsize()
+        metrics["pending"] = self._pending
+        return metrics
+
+_worker = None
+_worker_lock = threading.Lock()
+# Set by stop_persistence_worker(): no new worker may start once the application shuts down
+_shutdown = False
+
+def get_persistence_worker():
+    """
+    Get the shared persistence worker, starting it on first use.
+
+    After stop_persistence_worker() the stopped worker is returned: its metrics
+    stay readable but it refuses new jobs, so nothing is queued to a worker
+    that would never be flushed.
+
+    Returns:
+        PersistenceWorker: The running (or, after shutdown, stopped) worker.
+    """
+    global _worker
+    with _worker_lock:
+        if _shutdown:
+            if _worker is None:
+                raise RuntimeError("Persistence worker is stopped")
+            return _worker
+        if _worker is None or not _worker.is_alive():
+            _worker = PersistenceWorker()
+            _worker.start()
+        return _worker
+
+def stop_persistence_worker(timeout=None):
+    """
+    Flush and stop the shared persistence worker (call on application shutdown).
+
+    Args:
+        timeout (float): Maximum time to wait in seconds (optional).
+
+    Returns:
+        bool: True if every pending detection was written.
+    """
+    global _shutdown
+    with _worker_lock:
+        _shutdown = True
+        if _worker is None:
+            return True
+        flushed = _worker.stop(timeout)
+    print(f"Persistence worker stopped ({'all records written' if flushed else 'pending records lost'})")
+    return flushed
@@ -0,0 +1,20 @@
+import os
+import pytest
+from sqlite_database.src import db_operations, image_store
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the database and the image store at a temporary directory (schema created)."""
+    monkeypatch.setattr(db_operations, "DB_PATH", str(tmp_path / "detections.db"))
+    monkeypatch.setattr(image_store, "IMAGE_DIRS", {
+        image_type: str(tmp_path / os.path.basename(path))
+        for image_type, path in image_store.IMAGE_DIRS.items()
+    })
+    # Caches belong to the previous database
+    db_operations.invalidate_count_cache()
+    db_operations.invalidate_defect_catalog()
+    db_operations.create_database()
+    yield db_operations.DB_PATH
+    db_operations.close_all_connections()
+    db_operations.invalidate_count_cache()
+    db_operations.invalidate_defect_catalog()
@@ -0,0 +1,83 @@
+import sqlite3
+import cv2
+import numpy as np
+from sqlite_database.src import db_operations
+
+def _png(value):
+    return cv2.imencode(".png", np.full((8, 8, 3), value, dtype=np.uint8))[1].tobytes()
+
+def _insert(time_str, defect, barcode=None):
+    """Insert one record at a given time through the batch writer."""
+    detections = db_operations.detections_from_summary(defect)
+    values = (time_str, _png(1), None, defect, barcode, detections, {}, None)
+    return db_operations.save_detections_batch([("insert", values)])[0]
+
+def test_legacy_database_is_migrated_to_the_current_schema(tmp_path, monkeypatch):
+    # Database written before migrations existed: version 0, inline images, flattened defects
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE detections (id INTEGER PRIMARY KEY AUTOINCREMENT, time TEXT, "
+            "img_raw BLOB, img_detect BLOB, defect TEXT, barcode TEXT)"
+        )
+        conn.executemany("INSERT INTO detections (time, img_raw, defect, barcode) VALUES (?, ?, ?, ?)", [
+            ("2025-01-01 08:00:00", _png(1), "bridge, miss", "A"),
+            ("2025-01-02 09:00:00", _png(2), "No defects", "B"),
+        ])
+    conn.close()
+    monkeypatch.setattr(db_operations, "DB_PATH", db_path)
+    db_operations.invalidate_defect_catalog()
+    try:
+        db_operations.create_database()
+
+        conn = db_operations.get_connection()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == db_operations.SCHEMA_VERSION
+        # ts backfilled from the text time, defects split into the defect index
+        assert conn.execute("SELECT ts FROM detections ORDER BY id").fetchall() == [
+            (db_operations.to_epoch("2025-01-01 08:00:00"),), (db_operations.to_epoch("2025-01-02 09:00:00"),)
+        ]
+        assert conn.execute(
+            "SELECT detection_id, class_name FROM detection_defects ORDER BY detection_id, class_name"
+        ).fetchall() == [(1, "bridge"), (1, "miss")]
+        assert db_operations.get_defect_types() == ["bridge", "miss"]
+        # Inline images are still readable before migrate_images.py moves them to the image store
+        assert db_operations.get_image_data(1, "img_raw") == _png(1)
+
+        # Running again is a no-op
+        assert db_operations.migrate_schema() == db_operations.SCHEMA_VERSION
+    finally:
+        db_operations.close_all_connections()
+        db_operations.invalidate_count_cache()
+        db_operations.invalidate_defect_catalog()
+
+def test_keyset_pages_cover_every_record_once_newest_first(temp_db):
+    # Several records share a second: the id breaks the tie
+    times = [f"2025-03-01 10:00:{second:02d}" for second in (0, 0, 0, 1, 2, 2, 3, 4, 4, 4, 5)]
+    row_ids = [_insert(time_str, "bridge" if i % 3 == 0 else "No defects") for i, time_str in enumerate(times)]
+
+    pages, cursor = [], None
+    while True:
+        page = db_operations.get_detections_page("2025-03-01", "2025-03-02", None, 4, cursor)
+        if not page:
+            break
+        pages.append(page)
+        cursor = (page[-1][6], page[-1][0])
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    seen = [record[0] for page in pages for record in page]
+    expected = sorted(row_ids, key=lambda row_id: (db_operations.to_epoch(times[row_ids.index(row_id)]), row_id),
+                      reverse=True)
+    assert seen == expected
+
+def test_keyset_pages_apply_the_defect_filter(temp_db):
+    for i in range(7):
+        _insert(f"2025-03-01 11:00:{i:02d}", "bridge" if i % 2 == 0 else "No defects")
+    _insert("2025-03-02 11:00:00", "bridge")  # Outside the date range
+
+    first = db_operations.get_detections_page("2025-03-01", "2025-03-02", "bridge", 3)
+    second = db_operations.get_detections_page("2025-03-01", "2025-03-02", "bridge", 3, (first[-1][6], first[-1][0]))
+
+    assert [record[4] for record in first + second] == ["bridge"] * 4
+    assert len({record[0] for record in first + second}) == 4
+    assert db_operations.count_detections("2025-03-01", "2025-03-02", "bridge") == 4
+    assert db_operations.count_detections("2025-03-01", "2025-03-02", "No defects") == 3
@@ -0,0 +1,63 @@
+import threading
+import numpy as np
+from app.camera.frame_buffer import FrameRingBuffer
+
+def _frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+def _fill(buffer, timestamps):
+    for timestamp in timestamps:
+        buffer.put(_frame(int(timestamp)), timestamp)
+
+def test_at_returns_the_first_frame_at_or_after_the_trigger():
+    buffer = FrameRingBuffer(4)
+    _fill(buffer, [10, 20, 30])
+
+    frame, timestamp, frame_id = buffer.at(15, timeout=0)
+    assert (timestamp, frame_id) == (20, 1)
+    assert np.array_equal(frame, _frame(20))
+    assert buffer.at(20, timeout=0)[1] == 20
+
+def test_at_returns_a_copy_that_survives_the_slot_being_overwritten():
+    buffer = FrameRingBuffer(2)
+    _fill(buffer, [10])
+    frame = buffer.at(10, timeout=0)[0]
+    _fill(buffer, [20, 30, 40])
+    assert np.array_equal(frame, _frame(10))
+
+def test_at_waits_for_a_frame_that_has_not_arrived_yet():
+    buffer = FrameRingBuffer(4)
+    _fill(buffer, [10])
+    timer = threading.Timer(0.05, buffer.put, (_frame(50), 50))
+    timer.start()
+    try:
+        assert buffer.at(45, timeout=5)[1] == 50
+    finally:
+        timer.cancel()
+    assert buffer.at(60, timeout=0.01) is None
+
+def test_frame_of_a_trigger_is_lost_once_overwritten():
+    buffer = FrameRingBuffer(3)
+    _fill(buffer, [10, 20, 30, 40, 50])  # 10 and 20 overwritten
+
+    # Never a later frame in place of the overwritten one: the part must be reported, not mis-imaged
+    assert buffer.at(15, timeout=0) is None
+    assert buffer.at(20, timeout=0) is None
+    assert buffer.at(25, timeout=0)[1] == 30
+
+def test_overwritten_unread_frames_are_counted_as_dropped():
+    buffer = FrameRingBuffer(2)
+    _fill(buffer, [10, 20])
+    buffer.at(10, timeout=0)
+    _fill(buffer, [30, 40])  # Overwrites 10 (read) and 20 (never read)
+
+    stats = buffer.stats()
+    assert stats == {"frames_written": 4, "frames_dropped": 1, "buffered": 2}
+
+def test_clear_forgets_the_frames_of_earlier_triggers():
+    buffer = FrameRingBuffer(4)
+    _fill(buffer, [10, 20])
+    buffer.clear()
+    assert buffer.at(15, timeout=0) is None
+    _fill(buffer, [30])
+    assert buffer.at(25, timeout=0)[1] == 30
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sqlite_database.src import image_codec
+from sqlite_database.src.image_codec import (
+    PRESETS, available_presets, encode_image, decode_image, detect_codec, preset_for
+)
+
+# Presets that must give the raw frame back bit for bit (raw frames are the inspection evidence)
+LOSSLESS_PRESETS = ("png", "png-fast", "webp-lossless", "raw-zstd")
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    # Smooth gradient with noise, closer to a camera frame than pure noise
+    gradient = np.linspace(0, 200, 64 * 48, dtype=np.float32).reshape(48, 64, 1)
+    return np.clip(gradient + rng.normal(0, 8, (48, 64, 3)), 0, 255).astype(np.uint8)
+
+@pytest.mark.parametrize("preset", available_presets())
+def test_round_trip_of_every_available_preset(frame, preset):
+    data = encode_image(frame, preset)
+    codec = PRESETS[preset][0]
+
+    assert detect_codec(data) == codec
+    decoded = decode_image(data, codec)
+    assert decoded.shape == frame.shape and decoded.dtype == np.uint8
+    if preset in LOSSLESS_PRESETS:
+        assert np.array_equal(decoded, frame)
+    else:
+        # Annotated images only need to look right: PSNR above 30 dB
+        mse = np.mean((decoded.astype(float) - frame) ** 2)
+        assert 10 * np.log10(255 ** 2 / mse) > 30
+
+def test_codec_is_detected_when_not_recorded(frame):
+    # Rows written before codecs were recorded have a NULL codec
+    assert np.array_equal(decode_image(encode_image(frame, "png")), frame)
+
+def test_undecodable_data_gives_none():
+    assert decode_image(b"") is None
+    assert decode_image(b"not an image") is None
+    assert detect_codec(b"not an image") is None
+
+def test_unknown_preset_falls_back_to_png(monkeypatch):
+    monkeypatch.setitem(image_codec.IMAGE_PRESETS, "img_raw", "no-such-preset")
+    assert preset_for("img_raw") == "png"
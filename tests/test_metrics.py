@@ -0,0 +1,50 @@
+import csv
+import json
+from app.inspection.metrics import LatencyMetrics
+
+def test_percentiles_use_the_nearest_rank():
+    metrics = LatencyMetrics()
+    # Recorded out of order: percentiles come from the sorted window
+    for value in [51, 1, 101, *range(2, 51), *range(52, 101)]:
+        metrics.record("inference", float(value))
+
+    row = metrics.get("inference")
+    assert row["count"] == 101
+    assert (row["p50"], row["p95"], row["p99"], row["max"]) == (51, 96, 100, 101)
+    assert row["mean"] == 51
+    assert row["last"] == 100
+
+def test_single_sample_is_every_percentile():
+    metrics = LatencyMetrics()
+    metrics.record("db_insert", 7.5)
+    row = metrics.get("db_insert")
+    assert row["p50"] == row["p95"] == row["p99"] == row["max"] == 7.5
+
+def test_percentiles_cover_only_the_rolling_window():
+    metrics = LatencyMetrics(window=10)
+    for value in range(1, 101):
+        metrics.record("inference", float(value))
+
+    row = metrics.get("inference")
+    assert row["count"] == 100  # Every sample is counted
+    assert (row["p50"], row["max"]) == (95, 100)  # but only the last 10 (91..100) are ranked
+
+def test_summary_follows_the_stage_order():
+    metrics = LatencyMetrics()
+    for stage in ("zz_custom", "db_insert", "inference", "camera_grab"):
+        metrics.record(stage, 1.0)
+    assert [row["stage"] for row in metrics.summary()] == ["camera_grab", "inference", "db_insert", "zz_custom"]
+    assert metrics.get("annotate") is None
+
+def test_dump_writes_csv_and_json(tmp_path):
+    metrics = LatencyMetrics()
+    metrics.record("inference", 10.0)
+    metrics.record("inference", 20.0)
+
+    with open(metrics.dump(str(tmp_path / "metrics.csv")), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["stage"] == "inference" and float(rows[0]["p95"]) == 20.0
+
+    with open(metrics.dump(str(tmp_path / "metrics.json"))) as f:
+        data = json.load(f)
+    assert data["stages"][0]["count"] == 2
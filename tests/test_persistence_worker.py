@@ -0,0 +1,80 @@
+import sqlite3
+from datetime import datetime
+import cv2
+import numpy as np
+import pytest
+from sqlite_database.src import db_operations
+from sqlite_database.src.image_codec import decode_image
+from sqlite_database.src.persistence_worker import PersistenceWorker
+
+CAPTURED_AT = datetime(2025, 1, 1, 8, 30, 0)
+
+def _frame(value):
+    return np.full((32, 48, 3), value, dtype=np.uint8)
+
+def _encoded_frame(value):
+    return cv2.imencode(".png", _frame(value))[1].tobytes()
+
+@pytest.fixture
+def worker(temp_db):
+    worker = PersistenceWorker(max_batch_size=4)
+    worker.start()
+    yield worker
+    worker.stop(timeout=10)
+
+def _rows(db_path, query):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(query).fetchall()
+
+def test_frames_and_pre_encoded_images_are_all_written(worker, temp_db):
+    saved = []
+    for i in range(3):
+        worker.submit_insert(_frame(i), _frame(i + 100), "No defects", "FRAME", saved.append, capture_time=CAPTURED_AT)
+    # What the inspection pipeline submits: already encoded images with ready thumbnails
+    for i in range(3):
+        worker.submit_insert(_encoded_frame(i), _encoded_frame(i + 100), "bridge", "ENCODED", saved.append,
+                             thumbnails={}, capture_time=CAPTURED_AT)
+
+    assert worker.flush(timeout=30)
+    assert len(saved) == 6 and None not in saved
+    assert worker.get_metrics()["written"] == 6
+    assert _rows(temp_db, "SELECT barcode, COUNT(*) FROM detections GROUP BY barcode ORDER BY barcode") == [
+        ("ENCODED", 3), ("FRAME", 3)
+    ]
+    # Raw frames are stored losslessly and read back through the image store
+    raw = decode_image(db_operations.get_image_data(saved[1], "img_raw"))
+    assert np.array_equal(raw, _frame(1))
+
+def test_defects_are_indexed_and_counted(worker, temp_db):
+    saved = []
+    worker.submit_insert(_frame(1), _frame(2), "bridge, miss", "A", saved.append, capture_time=CAPTURED_AT)
+    worker.submit_insert(_frame(3), _frame(4), "No defects", "B", saved.append, capture_time=CAPTURED_AT)
+    assert worker.flush(timeout=30)
+
+    assert _rows(temp_db, "SELECT class_name FROM detection_defects ORDER BY class_name") == [("bridge",), ("miss",)]
+    assert db_operations.count_detections("2025-01-01", "2025-01-02", "bridge") == 1
+    assert db_operations.count_detections("2025-01-01", "2025-01-02", "No defects") == 1
+
+def test_uninspected_part_keeps_its_error_out_of_the_defects(worker, temp_db):
+    saved = []
+    worker.submit_insert(_frame(5), None, None, "C", saved.append, capture_time=CAPTURED_AT,
+                         inspection_error="Detection failed")
+    assert worker.flush(timeout=30)
+
+    assert _rows(temp_db, "SELECT defect, inspection_error FROM detections") == [(None, "Detection failed")]
+    assert _rows(temp_db, "SELECT COUNT(*) FROM detection_defects") == [(0,)]
+    assert "Detection failed" not in db_operations.get_defect_types()
+    record = db_operations.get_detection_record(saved[0], "2025-01-01", "2025-01-02")
+    assert record[4] == "Not inspected: Detection failed"
+
+def test_stop_writes_pending_jobs_then_refuses_new_ones(temp_db):
+    worker = PersistenceWorker()
+    worker.start()
+    saved = []
+    for i in range(5):
+        worker.submit_insert(_frame(i), _frame(i), "No defects", "D", saved.append, capture_time=CAPTURED_AT)
+
+    assert worker.stop(timeout=30)
+    assert len(saved) == 5 and None not in saved
+    with pytest.raises(RuntimeError):
+        worker.submit_insert(_frame(0), _frame(0), "No defects", "D")
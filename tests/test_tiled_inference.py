@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+from app.model.detector import prepare_inputs, parse_roi, _tile_starts, _merge_tile_detections, _boxes_to_frame
+
+def _boxes(*rows):
+    """(x1, y1, x2, y2, conf, cls) rows as the boxes tensor of a YOLO result."""
+    return torch.tensor(rows, dtype=torch.float32)
+
+def test_partial_box_at_a_tile_border_is_merged_into_the_whole_box():
+    merged = _merge_tile_detections(_boxes(
+        (100, 100, 200, 160, 0.9, 1),  # Whole defect, found in the left tile
+        (150, 100, 200, 160, 0.6, 1),  # Same defect cut by the right tile border
+    ))
+    assert merged.tolist() == [pytest.approx([100, 100, 200, 160, 0.9, 1])]
+
+def test_overlapping_boxes_of_other_classes_are_kept():
+    merged = _merge_tile_detections(_boxes(
+        (100, 100, 200, 160, 0.9, 1),
+        (110, 100, 190, 160, 0.8, 2),
+    ))
+    assert merged[:, 5].tolist() == [1, 2]
+
+def test_merge_keeps_the_most_confident_box_of_each_group():
+    merged = _merge_tile_detections(_boxes(
+        (0, 0, 50, 50, 0.5, 0),
+        (300, 300, 340, 340, 0.7, 0),  # Separate defect
+        (5, 5, 50, 50, 0.8, 0),
+    ))
+    assert merged[:, 4].tolist() == pytest.approx([0.8, 0.7])
+
+def test_tiles_cover_the_roi_with_the_configured_overlap():
+    assert _tile_starts(1294, 640, 512) == [0, 512, 654]
+    assert _tile_starts(500, 640, 512) == [0]
+
+    frame = np.zeros((964, 1294, 3), dtype=np.uint8)
+    inputs = prepare_inputs(frame, roi="", tiled=True, tile_size=640, overlap=0.2, size=640)
+    assert len(inputs) == 2 * 3
+    assert all(image.shape == (640, 640, 3) for image, _ in inputs)
+
+def test_boxes_of_an_roi_input_map_back_to_frame_coordinates():
+    frame = np.zeros((964, 1294, 3), dtype=np.uint8)
+    (image, transform), = prepare_inputs(frame, roi=(200, 100, 640, 320), tiled=False, size=640)
+    assert image.shape == (640, 640, 3)
+
+    # The ROI fills the input width and is padded vertically: its content starts at y=160
+    result = SimpleNamespace(boxes=SimpleNamespace(data=_boxes((0, 160, 64, 192, 0.9, 0))))
+    assert _boxes_to_frame(result, transform, 1294, 964).tolist() == [
+        pytest.approx([200, 100, 264, 132, 0.9, 0])
+    ]
+
+def test_invalid_roi_falls_back_to_the_whole_frame():
+    assert parse_roi("10,20,30") is None
+    assert parse_roi("10,20,0,40") is None
+    assert parse_roi("10,20,30,40") == (10, 20, 30, 40)